@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, UserProfile, ActivityData, WeightData, SleepData
+from .models import User, UserProfile, ActivityData, WeightData, SleepData, SyncCursor, MetricRollup, HealthSample, UserInsights, APIToken
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -15,10 +15,42 @@ admin.site.register(User, UserAdmin)
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ['user', 'hc_gateway_user_id', 'sync_enabled', 'last_sync']
+    list_display = ['user', 'hc_gateway_user_id', 'sync_enabled', 'last_sync', 'next_sync_at', 'sync_interval']
     list_filter = ['sync_enabled', 'last_sync']
     search_fields = ['user__username', 'hc_gateway_user_id']
 
+@admin.register(SyncCursor)
+class SyncCursorAdmin(admin.ModelAdmin):
+    list_display = ['user', 'data_type', 'last_record_start', 'updated_at']
+    list_filter = ['data_type']
+    search_fields = ['user__username']
+
+@admin.register(MetricRollup)
+class MetricRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'metric', 'granularity', 'period_start', 'count', 'average']
+    list_filter = ['metric', 'granularity']
+    search_fields = ['user__username']
+    date_hierarchy = 'period_start'
+
+@admin.register(HealthSample)
+class HealthSampleAdmin(admin.ModelAdmin):
+    list_display = ['user', 'data_type', 'start', 'end', 'value']
+    list_filter = ['data_type']
+    search_fields = ['user__username']
+    date_hierarchy = 'start'
+
+@admin.register(UserInsights)
+class UserInsightsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'as_of', 'current_step_streak', 'longest_step_streak', 'steps_avg_7', 'weight_trend']
+    search_fields = ['user__username']
+    readonly_fields = ['updated_at']
+
+@admin.register(APIToken)
+class APITokenAdmin(admin.ModelAdmin):
+    list_display = ['user', 'name', 'prefix', 'scopes', 'expires_at', 'last_used_at']
+    search_fields = ['user__username', 'name', 'prefix']
+    readonly_fields = ['prefix', 'key_hash', 'last_used_at', 'created_at']
+
 @admin.register(ActivityData)
 class ActivityDataAdmin(admin.ModelAdmin):
     list_display = ['user', 'date', 'steps', 'distance', 'calories_burned']
@@ -1,172 +1,365 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import ActivityData, WeightData, SleepData
+from .models import ActivityData, WeightData, SleepData, SyncCursor
+from .bulk import bulk_upsert, UpsertResult
+from .signals import notify_metric_data_changed
+from .samples import SAMPLE_DATA_TYPES, store_and_aggregate
+from . import instrumentation as metrics
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 import logging
+import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+class HCGatewayError(Exception):
+    """HCGateway could not be reached or returned an unusable response"""
+
 def get_oauth_token(service_name):
     return settings.OAUTH_TOKENS.get(service_name, '')
 
-def get_hcgateway_data(user_id, data_type):
+ACTIVITY_FIELDS = ['steps', 'distance', 'calories_burned']
+WEIGHT_FIELDS = ['weight']
+SLEEP_FIELDS = ['sleep_start', 'sleep_end', 'total_sleep_minutes']
+
+METRIC_NAMES = {ActivityData: 'activity', WeightData: 'weight', SleepData: 'sleep'}
+
+# Per-process pooled session; rebuilt after a fork so Celery prefork children
+# never share sockets with their parent
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def _build_hcgateway_session():
+    retry = Retry(
+        total=getattr(settings, 'HCGATEWAY_MAX_RETRIES', 3),
+        backoff_factor=getattr(settings, 'HCGATEWAY_RETRY_BACKOFF', 0.5),
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'POST']),  # fetch calls are read-only
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    pool_size = getattr(settings, 'HCGATEWAY_POOL_SIZE', 10)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+    })
+    return session
+
+def get_hcgateway_session():
+    """Return this process's keep-alive session for HCGateway calls"""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_hcgateway_session()
+                _session_pid = pid
+    return _session
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def get_hcgateway_data(user_id, data_type, since=None, limit=50):
     """
     Fetch data from HCGateway API
     data_type can be: 'steps', 'weight', 'sleepSession'
+
+    Without `since` the newest `limit` records are returned. With `since`,
+    records starting at or after that timestamp are returned oldest first so
+    the caller can page forward from a sync cursor. The bound is inclusive so
+    records sharing the cursor's timestamp (split across pages or syncs, or
+    uploaded late) are not skipped; writing them again is idempotent.
     """
     hc_gateway_url = getattr(settings, 'HCGATEWAY_API_URL', 'https://api.hcgateway.shuchir.dev')
+
+    if since is None:
+        queries = [f"limit({limit})", "orderDesc(start)"]
+    else:
+        queries = [
+            f"greaterThanEqual(start, {since.isoformat()})",
+            f"limit({limit})",
+            "orderAsc(start)"
+        ]
     
     try:
-        response = requests.post(
-            f"{hc_gateway_url}/api/fetch/{data_type}",
-            json={
-                "userid": user_id,
-                "queries": [
-                    "limit(50)",
-                    "orderDesc(start)"
-                ]
-            },
-            headers={'Content-Type': 'application/json'},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"HCGateway API error: {response.status_code} - {response.text}")
-            return None
-            
+        with metrics.fetch_seconds.time(data_type=data_type):
+            response = get_hcgateway_session().post(
+                f"{hc_gateway_url}/api/fetch/{data_type}",
+                json={
+                    "userid": user_id,
+                    "queries": queries
+                },
+                timeout=getattr(settings, 'HCGATEWAY_TIMEOUT', 30)
+            )
     except requests.RequestException as e:
         logger.error(f"Failed to fetch {data_type} from HCGateway: {e}")
+        metrics.errors.inc(kind='connection')
         return None
 
-def sync_steps_data(user, hc_user_id):
-    """Sync steps data from HCGateway"""
-    data = get_hcgateway_data(hc_user_id, 'steps')
-    if not data or 'data' not in data:
-        return 0
-    
-    synced_count = 0
-    for record in data['data']:
+    if response.status_code != 200:
+        logger.error(f"HCGateway API error: {response.status_code} - {response.text}")
+        metrics.errors.inc(kind='http_status')
+        return None
+
+    try:
+        with metrics.decode_seconds.time(data_type=data_type):
+            data = response.json()
+    except ValueError as e:
+        logger.error(f"Invalid JSON from HCGateway for {data_type}: {e}")
+        metrics.errors.inc(kind='decode')
+        return None
+
+    if isinstance(data, dict) and isinstance(data.get('data'), list):
+        metrics.records_parsed.inc(len(data['data']), data_type=data_type)
+    return data
+
+def fetch_new_records(hc_user_id, data_type, since):
+    """
+    Page through HCGateway records starting at or after `since`.
+
+    Returns (records, high_water_mark). Pages are requested oldest first in
+    chunks of HCGATEWAY_PAGE_SIZE, stopping at a short page, at a page that
+    does not move the high-water mark (every record shares one timestamp) or
+    after HCGATEWAY_MAX_PAGES so a large backlog is caught up over several
+    syncs. Records at the boundary are returned again by the next page or
+    sync; unchanged rows are skipped when they are written.
+
+    Raises HCGatewayError when the first page can't be fetched, so a failed
+    sync is not mistaken for one with nothing new. A later page failing
+    returns what was fetched so far.
+    A first sync without a cursor starts from HCGATEWAY_INITIAL_SYNC_START.
+    """
+    page_size = getattr(settings, 'HCGATEWAY_PAGE_SIZE', 500)
+    max_pages = getattr(settings, 'HCGATEWAY_MAX_PAGES', 20)
+    if since is None:
+        since = datetime.fromisoformat(
+            getattr(settings, 'HCGATEWAY_INITIAL_SYNC_START', '1970-01-01T00:00:00+00:00')
+        )
+
+    records = []
+    high_water_mark = since
+    for _ in range(max_pages):
+        data = get_hcgateway_data(hc_user_id, data_type, since=high_water_mark, limit=page_size)
+        if not data or 'data' not in data:
+            if not records:
+                raise HCGatewayError(f"Could not fetch {data_type} records from HCGateway")
+            break
+
+        page = data['data']
+        records.extend(page)
+        page_start = high_water_mark
+        for record in page:
+            try:
+                high_water_mark = max(high_water_mark, _parse_timestamp(record['start']))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+        if len(page) < page_size or high_water_mark == page_start:
+            break
+
+    return records, high_water_mark
+
+def parse_steps_records(records):
+    """Collapse HCGateway steps records into ActivityData values keyed by date"""
+    rows = {}
+    for record in records:
         try:
             # Parse the encrypted data - in real implementation, you'd decrypt it
             # For MVP, we'll assume the data structure includes the needed fields
-            record_date = datetime.fromisoformat(record['start'].replace('Z', '+00:00')).date()
-            
+            record_date = _parse_timestamp(record['start']).date()
+
             # Extract steps count from the decrypted data
             # This is a simplified example - actual implementation would decrypt the data field
             steps_count = record.get('count', 0)  # Placeholder
-            
-            # Create or update activity data
-            activity_data, created = ActivityData.objects.update_or_create(
-                user=user,
-                date=record_date,
-                defaults={
-                    'steps': steps_count,
-                    'distance': steps_count * 0.0008,  # Rough estimate: 0.8m per step
-                    'calories_burned': int(steps_count * 0.04)  # Rough estimate
-                }
-            )
-            
-            if created:
-                synced_count += 1
-                
+
+            rows[record_date] = {
+                'steps': steps_count,
+                'distance': steps_count * 0.0008,  # Rough estimate: 0.8m per step
+                'calories_burned': int(steps_count * 0.04)  # Rough estimate
+            }
         except (ValueError, KeyError) as e:
             logger.error(f"Error processing steps record: {e}")
+            metrics.errors.inc(kind='record')
             continue
-    
-    return synced_count
+    return rows
 
-def sync_weight_data(user, hc_user_id):
-    """Sync weight data from HCGateway"""
-    data = get_hcgateway_data(hc_user_id, 'weight')
-    if not data or 'data' not in data:
-        return 0
-    
-    synced_count = 0
-    for record in data['data']:
+def parse_weight_records(records):
+    """Collapse HCGateway weight records into WeightData values keyed by date"""
+    rows = {}
+    for record in records:
         try:
-            record_date = datetime.fromisoformat(record['start'].replace('Z', '+00:00')).date()
-            
+            record_date = _parse_timestamp(record['start']).date()
+
             # Extract weight from the decrypted data
             # This is a simplified example - actual implementation would decrypt the data field
             weight_kg = record.get('weight', 0)  # Placeholder
-            
-            weight_data, created = WeightData.objects.update_or_create(
-                user=user,
-                date=record_date,
-                defaults={'weight': weight_kg}
-            )
-            
-            if created:
-                synced_count += 1
-                
+
+            rows[record_date] = {'weight': weight_kg}
         except (ValueError, KeyError) as e:
             logger.error(f"Error processing weight record: {e}")
+            metrics.errors.inc(kind='record')
             continue
-    
-    return synced_count
+    return rows
 
-def sync_sleep_data(user, hc_user_id):
-    """Sync sleep data from HCGateway"""
-    data = get_hcgateway_data(hc_user_id, 'sleepSession')
-    if not data or 'data' not in data:
-        return 0
-    
-    synced_count = 0
-    for record in data['data']:
+def parse_sleep_records(records):
+    """Collapse HCGateway sleep sessions into SleepData values keyed by date"""
+    rows = {}
+    for record in records:
         try:
-            record_date = datetime.fromisoformat(record['start'].replace('Z', '+00:00')).date()
-            
             # Extract sleep data from the decrypted data
             # This is a simplified example - actual implementation would decrypt the data field
-            start_time = datetime.fromisoformat(record['start'].replace('Z', '+00:00'))
-            end_time = datetime.fromisoformat(record['end'].replace('Z', '+00:00'))
+            start_time = _parse_timestamp(record['start'])
+            end_time = _parse_timestamp(record['end'])
             total_minutes = int((end_time - start_time).total_seconds() / 60)
-            
-            sleep_data, created = SleepData.objects.update_or_create(
-                user=user,
-                date=record_date,
-                defaults={
-                    'sleep_start': start_time,
-                    'sleep_end': end_time,
-                    'total_sleep_minutes': total_minutes
-                }
-            )
-            
-            if created:
-                synced_count += 1
-                
+
+            rows[start_time.date()] = {
+                'sleep_start': start_time,
+                'sleep_end': end_time,
+                'total_sleep_minutes': total_minutes
+            }
         except (ValueError, KeyError) as e:
             logger.error(f"Error processing sleep record: {e}")
+            metrics.errors.inc(kind='record')
             continue
-    
-    return synced_count
+    return rows
+
+def store_health_records(user, data_type, records, parse, model, fields):
+    """
+    Write HCGateway records of one data type. Steps and sleep are kept as raw
+    samples and the touched days re-aggregated; other types are upserted as
+    one row per day.
+    """
+    if data_type in SAMPLE_DATA_TYPES:
+        return store_and_aggregate(user, data_type, records)
+    return bulk_upsert(model, user, parse(records), fields, skip_unchanged=True)
+
+def _store_records(user, cursor, records, high_water_mark, parse, model, fields):
+    """Upsert fetched records and advance the cursor once they are safely written"""
+    if not records:
+        return UpsertResult([], [])
+
+    with metrics.upsert_seconds.time(data_type=cursor.data_type):
+        result = store_health_records(user, cursor.data_type, records, parse, model, fields)
+    notify_metric_data_changed(model, user.pk, METRIC_NAMES[model], result.created + result.updated)
+
+    if cursor.last_record_start is None or high_water_mark > cursor.last_record_start:
+        cursor.last_record_start = high_water_mark
+        cursor.save(update_fields=['last_record_start', 'updated_at'])
+
+    metrics.records_written.inc(result.created_count, data_type=cursor.data_type, result='created')
+    metrics.records_written.inc(result.updated_count, data_type=cursor.data_type, result='updated')
+    return result
+
+def _sync_data_type(user, hc_user_id, data_type, parse, model, fields):
+    """Fetch records newer than the user's cursor, upsert them and advance the cursor"""
+    cursor, _ = SyncCursor.objects.get_or_create(user=user, data_type=data_type)
+    records, high_water_mark = fetch_new_records(hc_user_id, data_type, cursor.last_record_start)
+    return _store_records(user, cursor, records, high_water_mark, parse, model, fields)
+
+def sync_steps_data(user, hc_user_id):
+    """Sync steps data from HCGateway"""
+    return _sync_data_type(user, hc_user_id, 'steps', parse_steps_records, ActivityData, ACTIVITY_FIELDS)
+
+def sync_weight_data(user, hc_user_id):
+    """Sync weight data from HCGateway"""
+    return _sync_data_type(user, hc_user_id, 'weight', parse_weight_records, WeightData, WEIGHT_FIELDS)
+
+def sync_sleep_data(user, hc_user_id):
+    """Sync sleep data from HCGateway"""
+    return _sync_data_type(user, hc_user_id, 'sleepSession', parse_sleep_records, SleepData, SLEEP_FIELDS)
+
+# (summary key, HCGateway data type, parser, model, upserted fields)
+SYNC_DATA_TYPES = [
+    ('steps', 'steps', parse_steps_records, ActivityData, ACTIVITY_FIELDS),
+    ('weight', 'weight', parse_weight_records, WeightData, WEIGHT_FIELDS),
+    ('sleep', 'sleepSession', parse_sleep_records, SleepData, SLEEP_FIELDS),
+]
+
+def _timed_fetch(hc_user_id, data_type, since):
+    started = time.perf_counter()
+    records, high_water_mark = fetch_new_records(hc_user_id, data_type, since)
+    return records, high_water_mark, time.perf_counter() - started
 
 def sync_user_health_data(user_id, hc_user_id):
     """
     Sync all health data for a user from HCGateway
     Returns a summary of synced records
+
+    All data types are fetched concurrently (up to HCGATEWAY_FETCH_CONCURRENCY
+    requests at once), then written to the database one after another from
+    this thread, so per-user latency is the slowest fetch rather than the sum.
     """
     try:
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
         logger.error(f"User {user_id} does not exist")
+        metrics.errors.inc(kind='missing_user')
         return None
-    
-    steps_synced = sync_steps_data(user, hc_user_id)
-    weight_synced = sync_weight_data(user, hc_user_id)
-    sleep_synced = sync_sleep_data(user, hc_user_id)
-    
+
+    with metrics.user_sync_seconds.time():
+        return _sync_user(user, hc_user_id)
+
+def _sync_user(user, hc_user_id):
+    user_id = user.pk
+    cursors = {
+        data_type: SyncCursor.objects.get_or_create(user=user, data_type=data_type)[0]
+        for _, data_type, _, _, _ in SYNC_DATA_TYPES
+    }
+
+    concurrency = getattr(settings, 'HCGATEWAY_FETCH_CONCURRENCY', 3)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='hcgateway-fetch') as pool:
+        futures = {
+            key: pool.submit(_timed_fetch, hc_user_id, data_type, cursors[data_type].last_record_start)
+            for key, data_type, _, _, _ in SYNC_DATA_TYPES
+        }
+
+        results = {}
+        timings = {}
+        fetch_errors = []
+        for key, data_type, parse, model, fields in SYNC_DATA_TYPES:
+            try:
+                records, high_water_mark, fetch_seconds = futures[key].result()
+            except Exception as e:
+                logger.error(f"Failed to fetch {data_type} for user {user_id}: {e}")
+                if not isinstance(e, HCGatewayError):  # Already counted as connection/http_status/decode
+                    metrics.errors.inc(kind='fetch')
+                fetch_errors.append(key)
+                records, high_water_mark, fetch_seconds = [], None, 0.0
+
+            started = time.perf_counter()
+            results[key] = _store_records(user, cursors[data_type], records, high_water_mark, parse, model, fields)
+            timings[key] = {
+                'fetch_seconds': round(fetch_seconds, 3),
+                'write_seconds': round(time.perf_counter() - started, 3),
+                'records_fetched': len(records),
+            }
+
+    steps, weight, sleep = results['steps'], results['weight'], results['sleep']
     summary = {
         'user_id': user_id,
         'hc_user_id': hc_user_id,
-        'steps_records': steps_synced,
-        'weight_records': weight_synced,
-        'sleep_records': sleep_synced,
-        'total_records': steps_synced + weight_synced + sleep_synced,
+        'steps_records': steps.created_count,
+        'weight_records': weight.created_count,
+        'sleep_records': sleep.created_count,
+        'total_records': steps.created_count + weight.created_count + sleep.created_count,
+        'steps_updated': steps.updated_count,
+        'weight_updated': weight.updated_count,
+        'sleep_updated': sleep.updated_count,
+        'total_updated': steps.updated_count + weight.updated_count + sleep.updated_count,
+        'timings': timings,
+        'fetch_errors': fetch_errors,
         'synced_at': datetime.now()
     }
     
@@ -0,0 +1,27 @@
+from django.apps import AppConfig
+
+
+class FitfolioConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'fitfolio'
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.signals import request_started
+        from celery.signals import before_task_publish, task_prerun
+        from .database import check_connection_health
+        from .instrumentation import stamp_sent_at, record_queue_lag
+
+        if getattr(settings, 'DB_CONN_HEALTH_CHECKS', False):
+            request_started.connect(check_connection_health)
+            task_prerun.connect(check_connection_health)
+
+        # Celery queue lag for /metrics
+        before_task_publish.connect(stamp_sent_at)
+        task_prerun.connect(record_queue_lag)
+
+        # Connect metric_data_changed receivers; caching must come before
+        # timeseries, which expects the data version to be bumped already
+        from . import caching, rollups, timeseries, routers  # noqa: F401
+        # Token cache invalidation on APIToken / User changes
+        from . import authentication  # noqa: F401
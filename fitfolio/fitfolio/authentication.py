@@ -0,0 +1,191 @@
+"""
+Personal API tokens (Authorization: Bearer <token>)
+
+Tokens are 256-bit random secrets, so a single SHA-256 is enough to store
+them safely; unlike Basic auth there is no PBKDF2 run per request. A
+verified token is kept in a small in-process LRU, together with its User,
+so steady-state authentication costs no database queries. The shared cache
+only holds the token's fields, the user id and is_active (never the User
+row and its password hash); a process that finds a token there loads the
+user by primary key. Saving or deleting a token (or its user) drops the
+shared entry; other processes' LRU entries expire within
+API_TOKEN_LOCAL_TTL seconds.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from collections import OrderedDict, namedtuple
+import hashlib
+import secrets
+import threading
+import time
+from .caching import KEY_PREFIX
+from .models import APIToken, User
+
+TOKEN_PREFIX = 'ff_'
+INVALID = 'invalid'  # Cached for unknown digests so guessing doesn't hit the database
+
+# request.auth for token-authenticated requests
+TokenAuth = namedtuple('TokenAuth', ['token_id', 'scopes', 'expires_at'])
+
+
+def hash_token(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _cache_key(key_hash):
+    return f'{KEY_PREFIX}:apitoken:{key_hash}'
+
+
+def create_token(user, name, scopes=('read', 'write'), expires_at=None):
+    """Create a token; returns (APIToken, key). The key is never stored and can't be shown again."""
+    key = TOKEN_PREFIX + secrets.token_urlsafe(32)
+    token = APIToken.objects.create(
+        user=user, name=name, prefix=key[:len(TOKEN_PREFIX) + 6], key_hash=hash_token(key),
+        scopes=' '.join(scopes), expires_at=expires_at,
+    )
+    return token, key
+
+
+class _LocalTokens:
+    """Thread-safe LRU of digest -> (cached_at, entry), each entry trusted for API_TOKEN_LOCAL_TTL seconds"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key_hash):
+        ttl = getattr(settings, 'API_TOKEN_LOCAL_TTL', 30)
+        with self.lock:
+            item = self.entries.get(key_hash)
+            if item is None:
+                return None
+            if time.monotonic() - item[0] > ttl:
+                del self.entries[key_hash]
+                return None
+            self.entries.move_to_end(key_hash)
+            return item[1]
+
+    def set(self, key_hash, entry):
+        size = getattr(settings, 'API_TOKEN_LRU_SIZE', 1024)
+        with self.lock:
+            self.entries[key_hash] = (time.monotonic(), entry)
+            self.entries.move_to_end(key_hash)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key_hash):
+        with self.lock:
+            self.entries.pop(key_hash, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_tokens = _LocalTokens()
+
+
+def _load_token(key_hash):
+    """(shared cache entry, User) for a digest, or (INVALID, None)"""
+    token = APIToken.objects.select_related('user').filter(key_hash=key_hash).first()
+    if token is None:
+        return INVALID, None
+    entry = {
+        'user_id': token.user_id,
+        'is_active': token.user.is_active,
+        'auth': TokenAuth(
+            token.id, frozenset(token.scopes.split()),
+            token.expires_at.timestamp() if token.expires_at else None,
+        ),
+    }
+    return entry, token.user
+
+
+def lookup_token(key_hash):
+    """Token entry ({'user', 'auth'}) or INVALID"""
+    entry = local_tokens.get(key_hash)
+    if entry is not None:
+        return entry
+
+    shared = cache.get(_cache_key(key_hash))
+    if shared is None:
+        shared, user = _load_token(key_hash)
+        timeout = getattr(settings, 'API_TOKEN_LOCAL_TTL', 30) if shared == INVALID else \
+            getattr(settings, 'API_TOKEN_CACHE_TIMEOUT', 300)
+        cache.set(_cache_key(key_hash), shared, timeout)
+    elif shared == INVALID or not shared['is_active']:
+        user = None
+    else:
+        user = User.objects.filter(pk=shared['user_id']).first()
+
+    if shared == INVALID or (user is None and shared['is_active']):
+        entry = INVALID
+    else:
+        entry = {'user': user, 'auth': shared['auth']}
+    local_tokens.set(key_hash, entry)
+    return entry
+
+
+def _record_use(token_id):
+    """Stamp last_used_at at most once per API_TOKEN_USAGE_INTERVAL, not on every request"""
+    interval = getattr(settings, 'API_TOKEN_USAGE_INTERVAL', 3600)
+    if cache.add(f'{KEY_PREFIX}:apitoken-used:{token_id}', True, interval):
+        APIToken.objects.filter(pk=token_id).update(last_used_at=timezone.now())
+
+
+class APITokenAuthentication(BaseAuthentication):
+    """Authenticate `Authorization: Bearer <token>` requests against APIToken"""
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+
+        entry = lookup_token(hash_token(key))
+        if entry == INVALID:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        token = entry['auth']
+        if token.expires_at is not None and token.expires_at <= time.time():
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if entry['user'] is None or not entry['user'].is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        _record_use(token.token_id)
+        return entry['user'], token
+
+    def authenticate_header(self, request):
+        return 'Bearer'
+
+
+def _forget(key_hashes):
+    cache.delete_many([_cache_key(key_hash) for key_hash in key_hashes])
+    for key_hash in key_hashes:
+        local_tokens.discard(key_hash)
+
+
+@receiver(post_save, sender=APIToken)
+@receiver(post_delete, sender=APIToken)
+def forget_changed_token(sender, instance, **kwargs):
+    _forget([instance.key_hash])
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created=False, update_fields=None, **kwargs):
+    """Cached entries carry the user (is_active, and permissions locally), so drop them when it changes"""
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    _forget(list(APIToken.objects.filter(user=instance).values_list('key_hash', flat=True)))
@@ -0,0 +1,80 @@
+from typing import NamedTuple
+from django.db import transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT/UPDATE statement; keeps us well under SQLite's variable limit
+DEFAULT_BATCH_SIZE = 500
+
+
+class UpsertResult(NamedTuple):
+    """Keys (normally dates) that were inserted and updated by a bulk upsert"""
+    created: list
+    updated: list
+
+    @property
+    def created_count(self):
+        return len(self.created)
+
+    @property
+    def updated_count(self):
+        return len(self.updated)
+
+
+def bulk_upsert(model, user, rows, fields, batch_size=DEFAULT_BATCH_SIZE, key='date', scope=None,
+                skip_unchanged=False):
+    """
+    Insert or update per-day metric rows for a user (instance or id) in bulk.
+
+    `rows` maps a date to a dict of field values, so records collected for
+    the same (user, date) have already been collapsed by the caller. Existing
+    rows are looked up with one SELECT per batch, then written with
+    bulk_create / bulk_update instead of one update_or_create per record.
+
+    Tables keyed on something other than (user, date) pass the name of their
+    key field as `key` and any other unique-together columns in `scope`.
+    With `skip_unchanged`, existing rows whose values are all equal are
+    neither written nor reported as updated.
+    """
+    if not rows:
+        return UpsertResult([], [])
+
+    user_id = getattr(user, 'pk', user)
+    scope = scope or {}
+    keys = sorted(rows)
+    created, updated = [], []
+
+    with transaction.atomic():
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            existing = {
+                getattr(obj, key): obj
+                for obj in model.objects.filter(user_id=user_id, **scope, **{f'{key}__in': batch})
+                .only('id', key, *fields).order_by()
+            }
+
+            to_create, to_update = [], []
+            for row_key in batch:
+                values = rows[row_key]
+                obj = existing.get(row_key)
+                if obj is None:
+                    to_create.append(model(user_id=user_id, **scope, **{key: row_key}, **values))
+                elif skip_unchanged and all(getattr(obj, field) == value for field, value in values.items()):
+                    continue
+                else:
+                    for field, value in values.items():
+                        setattr(obj, field, value)
+                    to_update.append(obj)
+
+            if to_create:
+                model.objects.bulk_create(to_create, batch_size=batch_size)
+                created.extend(getattr(obj, key) for obj in to_create)
+            if to_update:
+                if fields:
+                    model.objects.bulk_update(to_update, fields, batch_size=batch_size)
+                updated.extend(getattr(obj, key) for obj in to_update)
+
+    logger.debug(f"Upserted {model.__name__} for user {user_id}: "
+                 f"{len(created)} created, {len(updated)} updated")
+    return UpsertResult(created, updated)
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from .signals import metric_data_changed
+import hashlib
+import time
+
+KEY_PREFIX = 'fitfolio'
+STAT_KEYS = {
+    'hits': f'{KEY_PREFIX}:cache:hits',
+    'misses': f'{KEY_PREFIX}:cache:misses',
+    'invalidations': f'{KEY_PREFIX}:cache:invalidations',
+}
+
+
+def _version_key(user_id, metric):
+    return f'{KEY_PREFIX}:version:{user_id}:{metric}'
+
+
+def _incr(key, initial=1):
+    """Atomic increment that also works when the key has been evicted"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, timeout=None)
+        return initial
+
+
+def data_version(user_id, metric):
+    """
+    Current version of a user's data for one metric
+
+    Versions start from a timestamp rather than 1 so that a version lost to
+    eviction can never come back around and revive stale cache entries.
+    """
+    key = _version_key(user_id, metric)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_id, metric):
+    _incr(_version_key(user_id, metric), initial=time.time_ns())
+    _incr(STAT_KEYS['invalidations'])
+
+
+def cached_response_data(user_id, metric, name, params, build):
+    """
+    Return response data for one of a user's metric endpoints, calling
+    `build` only on a miss. Keys embed the metric's data version, so a
+    write to that user's data invalidates every entry at once. Responses
+    built from several metrics pass a tuple of them as `metric`.
+    """
+    metrics = (metric,) if isinstance(metric, str) else tuple(metric)
+    versions = ':'.join(str(data_version(user_id, m)) for m in metrics)
+    params_hash = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:16]
+    key = f"{KEY_PREFIX}:response:{user_id}:{'+'.join(metrics)}:{versions}:{name}:{params_hash}"
+
+    data = cache.get(key)
+    if data is not None:
+        _incr(STAT_KEYS['hits'])
+        return data
+
+    _incr(STAT_KEYS['misses'])
+    data = build()
+    cache.set(key, data, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600))
+    return data
+
+
+def cache_stats():
+    values = cache.get_many(list(STAT_KEYS.values()))
+    stats = {name: values.get(key, 0) for name, key in STAT_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+    return stats
+
+
+@receiver(metric_data_changed)
+def invalidate_cached_responses(sender, user_id, metric, dates, **kwargs):
+    bump_data_version(user_id, metric)
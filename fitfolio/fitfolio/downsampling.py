@@ -0,0 +1,91 @@
+"""
+Vectorised downsampling of chart series
+
+Both algorithms return the indices of the points to keep, in order, so the
+same selection can be applied to every column of a series or to whole rows.
+"""
+import numpy as np
+
+DEFAULT_METHOD = 'lttb'
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: keeps the first and last point and, per
+    bucket, the point forming the largest triangle with the previously kept
+    point and the next bucket's average. Bucket averages are computed in one
+    pass; each bucket's triangle areas are a single array expression.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket i covers [bounds[i], bounds[i + 1]); the last one is the final point
+    bounds = np.append((np.arange(threshold - 1) * (count - 2) / (threshold - 2)).astype(int) + 1, count)
+    sizes = np.diff(bounds)
+    cumulative_x = np.concatenate(([0.0], np.cumsum(x)))
+    cumulative_y = np.concatenate(([0.0], np.cumsum(y)))
+    mean_x = (cumulative_x[bounds[1:]] - cumulative_x[bounds[:-1]]) / sizes
+    mean_y = (cumulative_y[bounds[1:]] - cumulative_y[bounds[:-1]]) / sizes
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - mean_x[bucket + 1]) * (y[start:end] - ay)
+                       - (ax - x[start:end]) * (mean_y[bucket + 1] - ay))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(x, y, threshold):
+    """
+    Min/max bucketing: keeps the first and last point plus the lowest and
+    highest point of each of (threshold - 2) // 2 equal buckets, with no
+    per-point or per-bucket Python loop.
+    """
+    count = len(y)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    y = np.asarray(y, dtype=float)
+
+    buckets = (threshold - 2) // 2
+    if buckets == 0:
+        return np.array([0, count - 1])
+    inner = y[1:count - 1]
+    bucket_ids = np.arange(count - 2) * buckets // (count - 2)
+    starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+    sizes = np.diff(np.r_[starts, count - 2])
+
+    kept = [np.array([0, count - 1])]
+    for reduce in (np.minimum, np.maximum):
+        # First position in each bucket holding the bucket's extreme value
+        hits = np.flatnonzero(inner == np.repeat(reduce.reduceat(inner, starts), sizes))
+        _, first = np.unique(bucket_ids[hits], return_index=True)
+        kept.append(hits[first] + 1)
+    return np.unique(np.concatenate(kept))
+
+
+DOWNSAMPLERS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices,
+}
+
+
+def downsample_indices(x, y, points, method=DEFAULT_METHOD):
+    """Indices of at most `points` points of the series, chosen by `method`"""
+    return DOWNSAMPLERS[method](x, y, points)
+
+
+def downsample_rows(rows, field, points, method=DEFAULT_METHOD):
+    """Downsample serialized rows (in date order, either direction) on one value field"""
+    if not points or points >= len(rows):
+        return rows
+    values = np.array([row.get(field) for row in rows], dtype=float)
+    indices = downsample_indices(np.arange(len(rows)), np.nan_to_num(values), points, method)
+    return [rows[i] for i in indices]
@@ -0,0 +1,93 @@
+"""
+Streaming export of a user's health history
+
+Each metric table is read in date order with QuerySet.iterator(), and the
+streams are merged by date with heapq.merge, so memory use depends on the
+chunk size and not on how many rows the user has.
+"""
+from django.conf import settings
+from itertools import groupby, islice
+from operator import itemgetter
+import heapq
+from .renderers import CSVRenderer, NDJSONRenderer
+from .serializers import (
+    ActivityDataSerializer, WeightDataSerializer, SleepDataSerializer, FastReadSerializer,
+)
+
+EXPORT_SERIALIZERS = {
+    'activity': ActivityDataSerializer,
+    'weight': WeightDataSerializer,
+    'sleep': SleepDataSerializer,
+}
+EXPORT_RENDERERS = {'ndjson': NDJSONRenderer, 'csv': CSVRenderer}
+
+# Serializer fields left out of the export; the date is the row key instead
+EXCLUDED_FIELDS = {'id', 'user', 'date'}
+
+
+def parse_metrics(value):
+    """Parse a comma-separated metric list, defaulting to every metric"""
+    if not value:
+        return list(EXPORT_SERIALIZERS)
+    metrics = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in metrics if name not in EXPORT_SERIALIZERS]
+    if unknown or not metrics:
+        raise ValueError(f"metrics must be a comma-separated subset of {', '.join(EXPORT_SERIALIZERS)}")
+    return list(dict.fromkeys(metrics))
+
+
+def export_fields(metric):
+    return [name for name in EXPORT_SERIALIZERS[metric].Meta.fields if name not in EXCLUDED_FIELDS]
+
+
+def _metric_stream(user_id, metric, chunk_size):
+    """Yield (date, metric, record) for one metric table in date order"""
+    serializer_class = EXPORT_SERIALIZERS[metric]
+    fast = FastReadSerializer(serializer_class)
+    fields = export_fields(metric)
+    rows = (
+        serializer_class.Meta.model.objects.filter(user_id=user_id)
+        .order_by('date')
+        .values_list(*fast.columns)
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        for record in fast.from_tuples(chunk):
+            yield record['date'], metric, {name: record[name] for name in fields}
+
+
+def export_rows(user_id, metrics, chunk_size=None):
+    """
+    Yield one dict per date with at least one record, oldest first, e.g.
+    {"date": "2025-01-01", "activity": {...}, "weight": None, "sleep": {...}}
+    """
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    streams = [_metric_stream(user_id, metric, chunk_size) for metric in metrics]
+    # ISO dates sort the same as the dates themselves
+    for day, records in groupby(heapq.merge(*streams, key=itemgetter(0)), key=itemgetter(0)):
+        row = {'date': day, **dict.fromkeys(metrics)}
+        for _, metric, record in records:
+            row[metric] = record
+        yield row
+
+
+def csv_rows(rows, metrics):
+    """Flatten export_rows into a header plus one list per date"""
+    columns = [(metric, name) for metric in metrics for name in export_fields(metric)]
+    yield ['date'] + [f'{metric}_{name}' for metric, name in columns]
+    for row in rows:
+        yield [row['date']] + [
+            row[metric][name] if row[metric] is not None else None for metric, name in columns
+        ]
+
+
+def stream_export(user_id, metrics, export_format='ndjson', chunk_size=None):
+    """Encoded export as an iterator of text chunks"""
+    renderer = EXPORT_RENDERERS[export_format]()
+    rows = export_rows(user_id, metrics, chunk_size)
+    if export_format == 'csv':
+        rows = csv_rows(rows, metrics)
+    return renderer.stream(rows)
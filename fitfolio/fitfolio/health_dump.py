@@ -0,0 +1,223 @@
+"""
+Streaming import of Health Connect / HCGateway dump files
+
+Dumps hold records in the shape HCGateway returns them (`start`, `end`,
+`count`, `weight`) either as NDJSON, one record per line, or as JSON: an
+array of records, or an object of arrays keyed by data type such as
+{"steps": [...], "weight": [...], "sleepSession": [...]}.
+
+Files are decoded one record at a time and written in batches through the
+same storage path as the HCGateway sync, so memory use depends
+on the batch size and not on the size of the file.
+"""
+from django.conf import settings
+from .api_clients import SYNC_DATA_TYPES, METRIC_NAMES, store_health_records
+from .signals import notify_metric_data_changed
+import codecs
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024  # Characters read from the file at a time
+# Decode errors this close to the end of the buffer may just mean the value
+# continues in the next chunk (a literal such as `false` or a \\uXXXX escape)
+TRUNCATION_LOOKAHEAD = 16
+DATA_TYPE_ALIASES = {'sleep': 'sleepSession'}
+
+# HCGateway data type -> (summary key, parser, model, upserted fields)
+DUMP_DATA_TYPES = {
+    data_type: (key, parse, model, fields)
+    for key, data_type, parse, model, fields in SYNC_DATA_TYPES
+}
+
+
+class DumpFormatError(ValueError):
+    """The file is not valid JSON/NDJSON in one of the supported layouts"""
+
+
+class _JSONStreamReader:
+    """Decodes JSON values one at a time from a text stream"""
+
+    def __init__(self, stream, max_record_size=None):
+        self.stream = stream
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        self.max_record_size = max_record_size or getattr(settings, 'HEALTH_DUMP_MAX_RECORD_SIZE', 1024 * 1024)
+
+    def _fill(self):
+        if self.pos > READ_CHUNK_SIZE:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.stream.read(READ_CHUNK_SIZE)
+        if chunk:
+            self.buffer += chunk
+        else:
+            self.eof = True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, characters):
+        char = self.peek()
+        if not char or char not in characters:
+            raise DumpFormatError(f'Expected one of {characters!r}, found {char or "end of file"!r}')
+        self.pos += 1
+        return char
+
+    def _fill_value(self):
+        """Read more of a value that runs past the buffer, up to max_record_size"""
+        if len(self.buffer) - self.pos > self.max_record_size:
+            raise DumpFormatError(f'Record larger than {self.max_record_size} characters')
+        self._fill()
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                # Only an error at the end of the buffered data (or in a string
+                # still open there) can be fixed by reading on; anything else
+                # is a malformed record
+                truncated = (exc.pos >= len(self.buffer) - TRUNCATION_LOOKAHEAD
+                             or exc.msg.startswith('Unterminated string'))
+                if self.eof or not truncated:
+                    raise DumpFormatError(str(exc))
+                self._fill_value()
+                continue
+            # A number running up to the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self._fill_value()
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_dump_records(stream, dump_format='json'):
+    """
+    Yield (data type or None, record) pairs from a binary dump stream.
+    The data type is None when it can only be inferred from the record.
+    """
+    reader = _JSONStreamReader(codecs.getreader('utf-8')(stream))
+
+    if dump_format == 'ndjson':
+        while reader.peek():
+            record = reader.value()
+            if isinstance(record, dict):
+                yield None, record
+        return
+
+    if reader.peek() == '[':
+        for record in reader.array():
+            if isinstance(record, dict):
+                yield None, record
+    else:
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if reader.peek() == '[':
+                data_type = DATA_TYPE_ALIASES.get(key, key)
+                data_type = data_type if data_type in DUMP_DATA_TYPES else None
+                for record in reader.array():
+                    if isinstance(record, dict):
+                        yield data_type, record
+            else:
+                reader.value()  # Metadata alongside the record arrays
+            if reader.expect(',}') == '}':
+                break
+
+    if reader.peek():
+        raise DumpFormatError('Unexpected data after the end of the document')
+
+
+def record_data_type(record, data_type=None):
+    """HCGateway data type of a record, from the dump layout or its fields"""
+    data_type = record.get('type') or record.get('dataType') or data_type
+    if data_type:
+        data_type = DATA_TYPE_ALIASES.get(data_type, data_type)
+        return data_type if data_type in DUMP_DATA_TYPES else None
+    if 'count' in record:
+        return 'steps'
+    if 'weight' in record:
+        return 'weight'
+    if 'end' in record:
+        return 'sleepSession'
+    return None
+
+
+def import_health_dump(user, stream, dump_format='json', batch_size=None):
+    """
+    Import a dump for a user, upserting each data type in batches.
+    Returns a summary with record counts and throughput.
+    """
+    batch_size = batch_size or getattr(settings, 'HEALTH_DUMP_BATCH_SIZE', 5000)
+    pending = {data_type: [] for data_type in DUMP_DATA_TYPES}
+    changed = {data_type: set() for data_type in DUMP_DATA_TYPES}
+    counts = {key: {'created': 0, 'updated': 0} for key, _, _, _ in DUMP_DATA_TYPES.values()}
+    records = skipped = 0
+    started = time.perf_counter()
+
+    def flush(data_type):
+        key, parse, model, fields = DUMP_DATA_TYPES[data_type]
+        result = store_health_records(user, data_type, pending[data_type], parse, model, fields)
+        pending[data_type] = []
+        counts[key]['created'] += result.created_count
+        counts[key]['updated'] += result.updated_count
+        changed[data_type].update(result.created + result.updated)
+
+    try:
+        for layout_type, record in iter_dump_records(stream, dump_format):
+            records += 1
+            data_type = record_data_type(record, layout_type)
+            if data_type is None:
+                skipped += 1
+                continue
+            pending[data_type].append(record)
+            if len(pending[data_type]) >= batch_size:
+                flush(data_type)
+
+        for data_type in DUMP_DATA_TYPES:
+            if pending[data_type]:
+                flush(data_type)
+    finally:
+        # Batches written before a malformed record stay imported, so announce them either way
+        for data_type, dates in changed.items():
+            if dates:
+                model = DUMP_DATA_TYPES[data_type][2]
+                notify_metric_data_changed(model, user.pk, METRIC_NAMES[model], sorted(dates))
+
+    seconds = time.perf_counter() - started
+    summary = {
+        'user_id': user.pk,
+        'records': records,
+        'skipped': skipped,
+        **{f'{key}_{outcome}': count for key, outcome_counts in counts.items()
+           for outcome, count in outcome_counts.items()},
+        'seconds': round(seconds, 3),
+        'records_per_second': round(records / seconds) if seconds else None,
+    }
+    logger.info(f"Health dump import completed for user {user.pk}: {summary}")
+    return summary
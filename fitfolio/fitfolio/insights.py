@@ -0,0 +1,193 @@
+"""
+Nightly per-user insights (streaks, personal bests, rolling averages, weight trend)
+
+Users are processed in chunks. Each chunk reads all of its users' rows with
+one query per metric (from the read replica, when configured), computes
+every user's insights with NumPy, and writes the UserInsights rows with one
+delete and one bulk_create. Chunks are independent, so they can run in a
+process pool (compute_insights command) or as a Celery chord
+(tasks.compute_nightly_insights).
+"""
+from django.conf import settings
+from django.db import transaction
+from datetime import date
+import numpy as np
+import time
+from .analytics import ANALYTICS_METRICS, ZERO_IS_MISSING, dense, ewma, rolling_mean
+from .models import UserProfile, UserInsights
+from .rollups import ROLLUP_METRICS
+from .routers import use_replica
+from .timeseries import epoch_day, from_epoch_day
+import logging
+
+logger = logging.getLogger(__name__)
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+EMPTY = (np.empty(0, dtype=np.int64), np.empty(0))
+
+
+def insight_user_ids():
+    """Users the nightly run covers"""
+    return list(
+        UserProfile.objects.filter(sync_enabled=True).order_by('user_id').values_list('user_id', flat=True)
+    )
+
+
+def make_chunks(user_ids, chunk_size=None):
+    chunk_size = chunk_size or getattr(settings, 'INSIGHTS_CHUNK_SIZE', 200)
+    user_ids = list(user_ids)
+    return [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+
+
+def load_chunk_series(user_ids):
+    """{user_id: {metric: (epoch days, values)}} for a chunk, one query per metric"""
+    series = {user_id: {metric: EMPTY for metric in ANALYTICS_METRICS} for user_id in user_ids}
+    for metric in ANALYTICS_METRICS:
+        model, field = ROLLUP_METRICS[metric]
+        rows = list(
+            model.objects.filter(user_id__in=user_ids)
+            .exclude(**{f'{field}__isnull': True})
+            .order_by('user_id', 'date')
+            .values_list('user_id', 'date', field)
+        )
+        if not rows:
+            continue
+        owners, dates, values = zip(*rows)
+        owners = np.array(owners)
+        days = np.fromiter((d.toordinal() - EPOCH_ORDINAL for d in dates), dtype=np.int64, count=len(dates))
+        values = np.array(values, dtype=float)
+        if metric in ZERO_IS_MISSING:
+            keep = values != 0
+            owners, days, values = owners[keep], days[keep], values[keep]
+
+        user_starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]]) if len(owners) else []
+        bounds = np.r_[user_starts, len(owners)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            series[int(owners[start])][metric] = (days[start:end], values[start:end])
+    return series
+
+
+def streaks(days):
+    """(last, longest) run of consecutive days in sorted epoch days"""
+    if not len(days):
+        return 0, 0
+    breaks = np.flatnonzero(np.diff(days) != 1)
+    run_starts = np.r_[0, breaks + 1]
+    run_ends = np.r_[breaks, len(days) - 1]
+    lengths = run_ends - run_starts + 1
+    return int(lengths[-1]), int(lengths.max())
+
+
+def _latest_mean(days, values, end, window):
+    if not len(days):
+        return None
+    value = rolling_mean(dense(days, values, end - window + 1, end), window)[-1]
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def _extreme(days, values, select):
+    if not len(days):
+        return None, None
+    index = int(select(values))
+    return values[index], from_epoch_day(int(days[index]))
+
+
+def compute_insights(series, today):
+    """Insight field values for one user's series, as of `today`"""
+    end = epoch_day(today)
+    goal = getattr(settings, 'INSIGHTS_STEP_GOAL', 10000)
+    step_days, steps = series['activity']
+    sleep_days, sleep = series['sleep']
+    weight_days, weights = series['weight']
+
+    goal_days = step_days[(steps >= goal) & (step_days <= end)]
+    current, longest = streaks(goal_days)
+    # Today may not be over yet, so a streak through yesterday is still current
+    if not len(goal_days) or goal_days[-1] < end - 1:
+        current = 0
+
+    best_steps, best_steps_date = _extreme(step_days, steps, np.argmax)
+    longest_sleep, longest_sleep_date = _extreme(sleep_days, sleep, np.argmax)
+    lowest_weight, lowest_weight_date = _extreme(weight_days, weights, np.argmin)
+
+    weight_trend = weight_trend_per_week = None
+    if len(weights):
+        trend = ewma(weights, getattr(settings, 'ANALYTICS_WEIGHT_ALPHA', 0.1))
+        weight_trend = round(float(trend[-1]), 2)
+        recent = weight_days >= end - 29
+        if recent.sum() >= 2 and np.ptp(weight_days[recent]) > 0:
+            weight_trend_per_week = round(float(np.polyfit(weight_days[recent], trend[recent], 1)[0] * 7), 3)
+
+    return {
+        'as_of': today,
+        'current_step_streak': current,
+        'longest_step_streak': longest,
+        'best_steps': int(best_steps) if best_steps is not None else None,
+        'best_steps_date': best_steps_date,
+        'steps_avg_7': _latest_mean(step_days, steps, end, 7),
+        'steps_avg_30': _latest_mean(step_days, steps, end, 30),
+        'longest_sleep_minutes': int(longest_sleep) if longest_sleep is not None else None,
+        'longest_sleep_date': longest_sleep_date,
+        'sleep_avg_7': _latest_mean(sleep_days, sleep, end, 7),
+        'sleep_avg_30': _latest_mean(sleep_days, sleep, end, 30),
+        'lowest_weight': float(lowest_weight) if lowest_weight is not None else None,
+        'lowest_weight_date': lowest_weight_date,
+        'weight_trend': weight_trend,
+        'weight_trend_per_week': weight_trend_per_week,
+    }
+
+
+def compute_insights_chunk(user_ids, today=None):
+    """Compute and store insights for a chunk of users; returns timings for the run summary"""
+    today = today or date.today()
+    started = time.perf_counter()
+    with use_replica():
+        series = load_chunk_series(user_ids)
+    loaded = time.perf_counter()
+
+    values = {}
+    for user_id in user_ids:
+        user_started = time.perf_counter()
+        values[user_id] = compute_insights(series[user_id], today)
+        values[user_id]['compute_seconds'] = time.perf_counter() - user_started
+    computed = time.perf_counter()
+
+    # Replacing the chunk's rows is one DELETE and one INSERT; bulk_update's
+    # per-field CASE expressions were the slowest part of the run
+    with transaction.atomic():
+        UserInsights.objects.filter(user_id__in=user_ids).delete()
+        UserInsights.objects.bulk_create(
+            [UserInsights(user_id=user_id, **fields) for user_id, fields in values.items()], batch_size=500
+        )
+    finished = time.perf_counter()
+
+    per_user = [fields['compute_seconds'] for fields in values.values()]
+    return {
+        'users': len(user_ids),
+        'load_seconds': loaded - started,
+        'compute_seconds': computed - loaded,
+        'write_seconds': finished - computed,
+        'seconds': finished - started,
+        'slowest_user_seconds': max(per_user, default=0.0),
+    }
+
+
+def summarize_insights_run(chunk_results, wall_seconds=None):
+    """Combine chunk timings into one run summary"""
+    users = sum(r['users'] for r in chunk_results)
+    busy_seconds = sum(r['seconds'] for r in chunk_results)
+    wall_seconds = busy_seconds if wall_seconds is None else wall_seconds
+    summary = {
+        'chunks': len(chunk_results),
+        'users': users,
+        'wall_seconds': round(wall_seconds, 3),
+        'busy_seconds': round(busy_seconds, 3),
+        'load_seconds': round(sum(r['load_seconds'] for r in chunk_results), 3),
+        'compute_seconds': round(sum(r['compute_seconds'] for r in chunk_results), 3),
+        'write_seconds': round(sum(r['write_seconds'] for r in chunk_results), 3),
+        'mean_user_ms': round(busy_seconds / users * 1000, 3) if users else None,
+        'slowest_user_ms': round(max((r['slowest_user_seconds'] for r in chunk_results), default=0.0) * 1000, 3),
+        'users_per_second': round(users / wall_seconds) if wall_seconds else None,
+    }
+    logger.info(f"Insights run completed: {summary}")
+    return summary
@@ -0,0 +1,277 @@
+"""
+Sync pipeline metrics in the Prometheus text exposition format
+
+Counters and histograms are kept in the shared cache and updated with
+atomic increments. Every web and Celery worker process therefore adds to
+the same series, and /metrics reports totals across all of them with no
+per-process registry and no push gateway. Without CACHE_URL the cache is
+in-memory, so each process only reports its own observations.
+
+Each metric declares its label values up front. That keeps the number of
+series bounded and lets /metrics read every series in one get_many.
+Recording is best effort: a cache outage never fails the code it measures.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import product
+import logging
+import time
+from .caching import KEY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# HCGateway data types synced by api_clients.SYNC_DATA_TYPES
+DATA_TYPES = ('steps', 'weight', 'sleepSession')
+
+ERROR_KINDS = (
+    'http_status',   # HCGateway answered with a non-200 status
+    'connection',    # Request failed: connection error, timeout, retries exhausted
+    'decode',        # Response body was not valid JSON
+    'record',        # A record was malformed and skipped
+    'fetch',         # Fetching a data type raised during a user sync
+    'missing_user',  # Sync requested for a user that no longer exists
+    'sync',          # A whole user sync failed
+)
+
+# Tasks in fitfolio.tasks whose queue lag is recorded
+TASK_NAMES = (
+    'sync_health_data_for_user', 'sync_health_data_batch', 'summarize_sync_run',
+    'sync_all_users_health_data', 'dispatch_due_health_syncs', 'update_health_data',
+    'compute_insights_chunk_task', 'summarize_insights_chunks', 'compute_nightly_insights',
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUEUE_LAG_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600)
+
+# Message header carrying the publish time, read back when the task starts
+SENT_AT_HEADER = 'fitfolio_sent_at'
+
+
+def metrics_enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def _add(key, delta):
+    """Atomic add that creates missing keys; never raises"""
+    try:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)  # Another process created it first
+    except Exception as e:
+        logger.debug(f"Could not record metric {key}: {e}")
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, **labels):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.label_values = [tuple(values) for values in labels.values()]
+        REGISTRY.append(self)
+
+    def _series(self, labels):
+        """Label values of a sample, or None (logged) when they aren't declared"""
+        if set(labels) != set(self.label_names):
+            logger.error(f"Dropped {self.name} sample: takes labels {', '.join(self.label_names) or '(none)'}, "
+                         f"got {', '.join(labels) or '(none)'}")
+            return None
+        values = tuple(str(labels[name]) for name in self.label_names)
+        for value, allowed in zip(values, self.label_values):
+            if value not in allowed:
+                logger.error(f"Dropped {self.name} sample: unexpected label value {value!r}")
+                return None
+        return values
+
+    def _key(self, values, suffix=''):
+        return f"{KEY_PREFIX}:metrics:{self.name}:{','.join(values)}{suffix}"
+
+    def all_series(self):
+        return list(product(*self.label_values))
+
+    def keys(self):
+        """Every cache key this metric reads when rendered"""
+        raise NotImplementedError
+
+    def samples(self, values):
+        """(name, label pairs, value) lines for this metric from fetched cache values"""
+        raise NotImplementedError
+
+    def render(self, values):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for name, pairs, value in self.samples(values):
+            lines.append(f'{name}{_format_labels(pairs)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if not amount or not metrics_enabled():
+            return
+        series = self._series(labels)
+        if series is not None:
+            _add(self._key(series), amount)
+
+    def keys(self):
+        return [self._key(series) for series in self.all_series()]
+
+    def samples(self, values):
+        for series in self.all_series():
+            pairs = list(zip(self.label_names, series))
+            yield self.name, pairs, values.get(self._key(series), 0)
+
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram of durations in seconds
+
+    Each observation increments one (non-cumulative) bucket and the sum, kept
+    in integer microseconds so it can be incremented atomically; the count
+    and the cumulative `le` buckets are derived when rendering.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS, **labels):
+        super().__init__(name, help, **labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, seconds, **labels):
+        if not metrics_enabled():
+            return
+        series = self._series(labels)
+        if series is None:
+            return
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        _add(self._key(series, f':b{index}'), 1)
+        _add(self._key(series, ':sum'), max(0, int(round(seconds * 1_000_000))))
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def keys(self):
+        return [
+            self._key(series, suffix)
+            for series in self.all_series()
+            for suffix in [f':b{i}' for i in range(len(self.buckets) + 1)] + [':sum']
+        ]
+
+    def samples(self, values):
+        for series in self.all_series():
+            pairs = list(zip(self.label_names, series))
+            cumulative = 0
+            for i, bound in enumerate(self.buckets + ('+Inf',)):
+                cumulative += values.get(self._key(series, f':b{i}'), 0)
+                yield f'{self.name}_bucket', pairs + [('le', _format_value(bound))], cumulative
+            yield f'{self.name}_sum', pairs, values.get(self._key(series, ':sum'), 0) / 1_000_000
+            yield f'{self.name}_count', pairs, cumulative
+
+
+REGISTRY = []
+
+fetch_seconds = Histogram(
+    'fitfolio_sync_fetch_seconds', 'HCGateway fetch request latency, retries included',
+    data_type=DATA_TYPES,
+)
+decode_seconds = Histogram(
+    'fitfolio_sync_decode_seconds', 'Time spent decoding HCGateway JSON responses',
+    data_type=DATA_TYPES,
+)
+upsert_seconds = Histogram(
+    'fitfolio_sync_upsert_seconds', 'Time spent upserting the records of one data type in a user sync',
+    data_type=DATA_TYPES,
+)
+user_sync_seconds = Histogram(
+    'fitfolio_sync_user_seconds', 'Wall time of one user sync, all data types',
+)
+queue_lag_seconds = Histogram(
+    'fitfolio_task_queue_lag_seconds', 'Time Celery tasks waited in the queue before starting',
+    buckets=QUEUE_LAG_BUCKETS, task=TASK_NAMES,
+)
+records_parsed = Counter(
+    'fitfolio_sync_records_parsed_total', 'Records received from HCGateway',
+    data_type=DATA_TYPES,
+)
+records_written = Counter(
+    'fitfolio_sync_records_written_total', 'Daily rows created or updated by syncs',
+    data_type=DATA_TYPES, result=('created', 'updated'),
+)
+users_synced = Counter(
+    'fitfolio_sync_users_total', 'User syncs by outcome',
+    result=('succeeded', 'failed'),
+)
+errors = Counter(
+    'fitfolio_sync_errors_total', 'Sync errors by kind',
+    kind=ERROR_KINDS,
+)
+
+
+def render_metrics():
+    """Every registered metric in the Prometheus text exposition format"""
+    keys = [key for metric in REGISTRY for key in metric.keys()]
+    try:
+        values = cache.get_many(keys)
+    except Exception as e:
+        logger.error(f"Could not read metrics from the cache: {e}")
+        values = {}
+    lines = [line for metric in REGISTRY for line in metric.render(values)]
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    """Drop every recorded value"""
+    cache.delete_many([key for metric in REGISTRY for key in metric.keys()])
+
+
+def stamp_sent_at(sender=None, headers=None, **kwargs):
+    """before_task_publish receiver: record when the task message was sent"""
+    if headers is not None:
+        headers.setdefault(SENT_AT_HEADER, time.time())
+
+
+def _task_name(task):
+    module, _, name = getattr(task, 'name', '').rpartition('.')
+    return name if module == 'fitfolio.tasks' and name in TASK_NAMES else None
+
+
+def record_queue_lag(sender=None, task=None, **kwargs):
+    """
+    task_prerun receiver: observe how long the task waited to start
+
+    Tasks with an ETA or countdown are measured from when they became due.
+    """
+    name = _task_name(task)
+    sent_at = getattr(task.request, SENT_AT_HEADER, None) if name else None
+    if sent_at is None:
+        return
+    due = float(sent_at)
+    eta = task.request.eta
+    if eta:
+        try:
+            eta = eta if isinstance(eta, datetime) else datetime.fromisoformat(eta)
+            due = max(due, eta.timestamp())
+        except (TypeError, ValueError):
+            pass
+    queue_lag_seconds.observe(max(0.0, time.time() - due), task=name)
@@ -0,0 +1,257 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection, connections, transaction, OperationalError
+from fitfolio.models import ActivityData, SleepData
+from fitfolio.serializers import SleepDataSerializer, FastReadSerializer
+from fitfolio.bulk import bulk_upsert
+from fitfolio.api_clients import ACTIVITY_FIELDS, METRIC_NAMES, SYNC_DATA_TYPES, store_health_records
+from fitfolio.signals import notify_metric_data_changed
+from fitfolio.analytics import analyze
+from fitfolio.timeseries import epoch_day
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+import time
+
+User = get_user_model()
+
+DEFAULT_RECORDS = {
+    'upsert': 10000,
+    'serializers': 100000,
+    'analytics': 1000,
+    'writers': 40,
+}
+WRITER_DAYS = 90  # Days of steps, weight and sleep records synced per user
+
+
+def _sync_records(days):
+    """HCGateway-shaped records for one user, keyed by data type"""
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return {
+        'steps': [
+            {'start': (start + timedelta(days=i, hours=h)).isoformat(),
+             'end': (start + timedelta(days=i, hours=h, minutes=30)).isoformat(), 'count': 500 + i % 300}
+            for i in range(days) for h in (8, 12, 18)
+        ],
+        'weight': [{'start': (start + timedelta(days=i, hours=7)).isoformat(), 'weight': 80 + i % 7 / 10}
+                   for i in range(days)],
+        'sleepSession': [
+            {'start': (start + timedelta(days=i, hours=23)).isoformat(),
+             'end': (start + timedelta(days=i + 1, hours=6, minutes=i % 60)).isoformat()}
+            for i in range(days)
+        ],
+    }
+
+
+def _sync_writer(user_ids):
+    """One simulated Celery worker: store a sync's worth of records per user, as _store_records does"""
+    records = _sync_records(WRITER_DAYS)
+    written, lock_errors = 0, 0
+    started = time.perf_counter()
+    for user in User.objects.filter(pk__in=user_ids):
+        for _, data_type, parse, model, fields in SYNC_DATA_TYPES:
+            try:
+                result = store_health_records(user, data_type, records[data_type], parse, model, fields)
+            except OperationalError:
+                lock_errors += 1
+                continue
+            notify_metric_data_changed(model, user.pk, METRIC_NAMES[model], result.created + result.updated)
+            written += len(records[data_type])
+    return written, lock_errors, time.perf_counter() - started
+
+
+class _Rollback(Exception):
+    """Raised to roll back everything a benchmark wrote"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Run performance benchmarks against the configured database. Writes are rolled back, except '
+        'for "writers", which commits real __benchmark_* users and rows from separate processes and '
+        'deletes them afterwards (an interrupted run can leave them behind)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'benchmark',
+            choices=['upsert', 'serializers', 'analytics', 'writers'],
+            help='Benchmark to run',
+        )
+        parser.add_argument(
+            '--records',
+            type=int,
+            help='Number of records (users for analytics and writers) to generate '
+                 '(default: 10000 for upsert, 100000 for serializers, 1000 for analytics, 40 for writers)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            nargs='+',
+            default=[1, 2, 4],
+            help='Concurrent writer processes to compare in the writers benchmark (default: 1 2 4)',
+        )
+
+    def handle(self, *args, **options):
+        records = options['records'] or DEFAULT_RECORDS[options['benchmark']]
+        if records < 1:
+            raise CommandError('--records must be positive')
+        if options['benchmark'] == 'writers':
+            self.bench_writers(records, options['workers'])
+        else:
+            getattr(self, f"bench_{options['benchmark']}")(records)
+
+    def _measure(self, label, func, *args):
+        """Run func inside a rolled back transaction, reporting queries and wall time"""
+        result = {'queries': 0}
+
+        def count_queries(execute, sql, params, many, context):
+            result['queries'] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            with transaction.atomic():
+                with connection.execute_wrapper(count_queries):
+                    started = time.perf_counter()
+                    func(*args)
+                    result['seconds'] = time.perf_counter() - started
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(
+            f"  {label:<28} {result['queries']:>8} queries  {result['seconds']:>8.3f}s"
+        )
+        return result
+
+    def bench_upsert(self, records):
+        """Compare per-record update_or_create with the bulk upsert path"""
+        start = date(2000, 1, 1)
+        rows = {
+            start + timedelta(days=i): {
+                'steps': 5000 + i % 1000,
+                'distance': (5000 + i % 1000) * 0.0008,
+                'calories_burned': int((5000 + i % 1000) * 0.04),
+            }
+            for i in range(records)
+        }
+
+        def prepare(user):
+            # Seed half of the range so both paths exercise inserts and updates
+            ActivityData.objects.bulk_create(
+                [ActivityData(user=user, date=d, steps=1) for d in list(rows)[::2]],
+                batch_size=500,
+            )
+
+        def legacy(user):
+            for record_date, values in rows.items():
+                ActivityData.objects.update_or_create(user=user, date=record_date, defaults=values)
+
+        def bulk(user):
+            bulk_upsert(ActivityData, user, rows, ACTIVITY_FIELDS)
+
+        def run(func):
+            user = User.objects.create(username=f'__benchmark_{time.time_ns()}')
+            prepare(user)
+            func(user)
+
+        self.stdout.write(f'Upserting {records} ActivityData records ({connection.vendor}):')
+        before = self._measure('update_or_create per record', run, legacy)
+        after = self._measure('bulk_upsert', run, bulk)
+
+        # Subtract the fixed setup cost (user + seed rows) from both runs
+        baseline = self._measure('setup only', run, lambda user: None)
+        per_10k = lambda r: (r['queries'] - baseline['queries']) * 10000 / records
+        self.stdout.write(self.style.SUCCESS(
+            f'Queries per 10k records: {per_10k(before):.0f} before, {per_10k(after):.0f} after'
+        ))
+
+    def bench_serializers(self, records):
+        """Serialize the same sleep rows through SleepDataSerializer and FastReadSerializer"""
+        start = date(2000, 1, 1)
+        night = datetime(2000, 1, 1, 23, tzinfo=timezone.utc)
+        instances = [
+            SleepData(
+                id=i, user_id=1, date=start + timedelta(days=i),
+                sleep_start=night + timedelta(days=i), sleep_end=night + timedelta(days=i, hours=8),
+                total_sleep_minutes=420 + i % 90, deep_sleep_minutes=90, light_sleep_minutes=240,
+                rem_sleep_minutes=90, awake_minutes=10, created_at=night,
+            )
+            for i in range(records)
+        ]
+        fast = FastReadSerializer(SleepDataSerializer)
+        # What values_list(*fast.columns) would return for the same rows
+        rows = [tuple(getattr(obj, column) for column in fast.columns) for obj in instances]
+
+        self.stdout.write(f'Serializing {records} SleepData rows:')
+        timings = {}
+        for label, func in [
+            ('SleepDataSerializer', lambda: SleepDataSerializer(instances, many=True).data),
+            ('FastReadSerializer', lambda: fast.from_tuples(rows)),
+        ]:
+            started = time.perf_counter()
+            func()
+            timings[label] = time.perf_counter() - started
+            self.stdout.write(f'  {label:<28} {timings[label]:>8.3f}s')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Fast path is {timings['SleepDataSerializer'] / timings['FastReadSerializer']:.1f}x faster"
+        ))
+
+    def bench_analytics(self, users):
+        """Time analyze() over five years of daily data per user, as in a nightly batch"""
+        rng = np.random.default_rng(0)
+        today = date.today()
+        days = np.arange(epoch_day(today) - 5 * 365, epoch_day(today) + 1)
+        histories = [
+            {
+                'activity': (days, rng.normal(8000, 2000, len(days))),
+                'weight': (days[::2], 80 + np.cumsum(rng.normal(0, 0.1, len(days[::2])))),
+                'sleep': (days, rng.normal(420, 40, len(days))),
+            }
+            for _ in range(min(users, 50))
+        ]
+
+        self.stdout.write(f'Analyzing {users} users with {len(days)} days of history each:')
+        started = time.perf_counter()
+        for i in range(users):
+            analyze(histories[i % len(histories)], today, 365)
+        seconds = time.perf_counter() - started
+        self.stdout.write(f"  {'analyze (365-day window)':<28} {seconds:>8.3f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f'{users / seconds:.0f} users/s ({seconds / users * 1000:.2f}ms per user)'
+        ))
+
+    def bench_writers(self, users, worker_counts):
+        """
+        Sync throughput with N concurrent writer processes, each standing in
+        for a Celery worker storing HCGateway records for its own users.
+        Separate processes can't share a rolled back transaction, so this
+        commits to the configured database and deletes the benchmark users
+        (and, by cascade, their rows) afterwards; a run killed before the
+        cleanup leaves __benchmark_* users behind.
+        """
+        vendor = connection.vendor
+        self.stdout.write(
+            f'Syncing {users} users x {WRITER_DAYS} days of steps, weight and sleep ({vendor}):'
+        )
+        for workers in worker_counts:
+            prefix = f'__benchmark_{time.time_ns()}_'
+            User.objects.bulk_create([User(username=f'{prefix}{i}') for i in range(users)])
+            user_ids = list(User.objects.filter(username__startswith=prefix).values_list('pk', flat=True))
+            chunks = [user_ids[i::workers] for i in range(workers)]
+            try:
+                # Forked workers must open their own connections
+                connections.close_all()
+                started = time.perf_counter()
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_sync_writer, chunks))
+                seconds = time.perf_counter() - started
+            finally:
+                User.objects.filter(username__startswith=prefix).delete()
+
+            written = sum(r[0] for r in results)
+            lock_errors = sum(r[1] for r in results)
+            self.stdout.write(
+                f"  {f'{workers} writer(s)':<28} {seconds:>8.3f}s  {written / seconds:>10.0f} records/s"
+                f"  {lock_errors} lock errors"
+            )
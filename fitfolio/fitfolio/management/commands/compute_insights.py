@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connections
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+import os
+import time
+from fitfolio.insights import insight_user_ids, make_chunks, compute_insights_chunk, summarize_insights_run
+from fitfolio.tasks import dispatch_insights_run
+
+User = get_user_model()
+
+
+def _setup_worker():
+    """Process pool initializer: each worker opens its own database connections"""
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Precompute UserInsights for all sync-enabled users in parallel chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Compute insights for a specific user (username)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (default: one per CPU core; 1 runs in this process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Users per chunk (default: INSIGHTS_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--queue',
+            action='store_true',
+            help='Queue the chunks as a Celery chord instead of using a local process pool',
+        )
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'User "{options["user"]}" does not exist.')
+            user_ids = [user.id]
+        else:
+            user_ids = insight_user_ids()
+        chunks = make_chunks(user_ids, options['chunk_size'])
+        today = date.today()
+
+        if options['queue']:
+            result = dispatch_insights_run(chunks, today)
+            if result['errors']:
+                raise CommandError(result['errors'][0])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Queued insights for {result["users_queued"]} users in {result["chunks"]} chunks '
+                    f'(run {result["run_id"]})'
+                )
+            )
+            return
+
+        started = time.perf_counter()
+        if options['workers'] <= 1 or len(chunks) <= 1:
+            results = [self.report(compute_insights_chunk(chunk, today)) for chunk in chunks]
+        else:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_setup_worker) as pool:
+                futures = [pool.submit(compute_insights_chunk, chunk, today) for chunk in chunks]
+                results = [self.report(future.result()) for future in as_completed(futures)]
+        summary = summarize_insights_run(results, time.perf_counter() - started)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Computed insights for {summary["users"]} users in {summary["chunks"]} chunks: '
+                f'{summary["wall_seconds"]}s wall, {summary["busy_seconds"]}s busy '
+                f'(load {summary["load_seconds"]}s, compute {summary["compute_seconds"]}s, '
+                f'write {summary["write_seconds"]}s), {summary["mean_user_ms"]}ms/user mean, '
+                f'{summary["slowest_user_ms"]}ms slowest, {summary["users_per_second"]} users/s'
+            )
+        )
+
+    def report(self, result):
+        self.stdout.write(
+            f'  chunk of {result["users"]} users: {result["seconds"]:.3f}s '
+            f'(load {result["load_seconds"]:.3f}s, compute {result["compute_seconds"]:.3f}s, '
+            f'write {result["write_seconds"]:.3f}s)'
+        )
+        return result
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from fitfolio.authentication import create_token
+from fitfolio.models import APIToken
+
+User = get_user_model()
+SCOPES = [scope for scope, _ in APIToken.SCOPE_CHOICES]
+
+class Command(BaseCommand):
+    help = 'Create a personal API token for a user; the token is printed once and never stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str)
+        parser.add_argument(
+            '--name',
+            type=str,
+            default='API token',
+            help='What the token is for, e.g. the uploading device',
+        )
+        parser.add_argument(
+            '--scopes',
+            nargs='+',
+            choices=SCOPES,
+            default=SCOPES,
+            help='Scopes granted to the token (default: read write)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Expire the token after this many days; defaults to never',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist.')
+
+        expires_at = timezone.now() + timedelta(days=options['days']) if options['days'] else None
+        token, key = create_token(user, options['name'], options['scopes'], expires_at)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created token "{token.name}" for {user.username} (scopes: {token.scopes}, '
+            f'expires: {expires_at.isoformat() if expires_at else "never"}). Store it now; it cannot be shown again:'
+        ))
+        self.stdout.write(key)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from fitfolio.export import EXPORT_RENDERERS, parse_metrics, stream_export
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Export a user's full health history as NDJSON or CSV, one row per date"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str, help='User to export')
+        parser.add_argument(
+            '--format',
+            choices=list(EXPORT_RENDERERS),
+            default='ndjson',
+            help='Output format (default: ndjson)',
+        )
+        parser.add_argument(
+            '--metrics',
+            type=str,
+            help='Comma-separated metrics to include (default: activity,weight,sleep)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='File to write to (default: stdout)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist.')
+        try:
+            metrics = parse_metrics(options['metrics'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        chunks = stream_export(user.pk, metrics, options['format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Exported {user.username} to {options["output"]}'))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from fitfolio.health_dump import DumpFormatError, import_health_dump
+import sys
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Import a Health Connect / HCGateway JSON or NDJSON dump for a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', type=str, help='User to import the records for')
+        parser.add_argument('file', type=str, help='Dump file to import, or - for stdin')
+        parser.add_argument(
+            '--format',
+            choices=['json', 'ndjson'],
+            help='Dump format (default: ndjson for .ndjson/.jsonl files, json otherwise)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Records upserted per batch (default: HEALTH_DUMP_BATCH_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist.')
+
+        path = options['file']
+        dump_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'json')
+        try:
+            if path == '-':
+                summary = import_health_dump(user, sys.stdin.buffer, dump_format, options['batch_size'])
+            else:
+                with open(path, 'rb') as stream:
+                    summary = import_health_dump(user, stream, dump_format, options['batch_size'])
+        except OSError as exc:
+            raise CommandError(f'Could not read {path}: {exc}')
+        except DumpFormatError as exc:
+            raise CommandError(f'Invalid {dump_format} dump: {exc}')
+
+        self.stdout.write(
+            f"Steps: {summary['steps_created']} created, {summary['steps_updated']} updated\n"
+            f"Weight: {summary['weight_created']} created, {summary['weight_updated']} updated\n"
+            f"Sleep: {summary['sleep_created']} created, {summary['sleep_updated']} updated"
+        )
+        if summary['skipped']:
+            self.stdout.write(self.style.WARNING(f"Skipped {summary['skipped']} records of unknown type"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['records']} records in {summary['seconds']:.1f}s "
+            f"({summary['records_per_second'] or 0} records/s)"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from fitfolio.rollups import ROLLUP_METRICS, rebuild_rollups
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = 'Rebuild weekly and monthly metric rollups from the raw health data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Rebuild rollups for a specific user (username); defaults to all users',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f'User "{options["user"]}" does not exist.')
+
+        for user in users.only('id', 'username'):
+            for metric in ROLLUP_METRICS:
+                rebuild_rollups(user.id, metric)
+            self.stdout.write(f'Rebuilt rollups for user "{user.username}"')
+
+        self.stdout.write(self.style.SUCCESS('Rollups rebuilt.'))
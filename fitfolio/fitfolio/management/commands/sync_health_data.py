@@ -1,7 +1,11 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from fitfolio.models import UserProfile
-from fitfolio.tasks import sync_health_data_for_user, sync_all_users_health_data
+from fitfolio.tasks import (
+    sync_health_data_for_user, sync_all_users_health_data, dispatch_due_health_syncs,
+    get_sync_batches, make_sync_batches, sync_health_data_batch, summarize_sync_run,
+)
+from fitfolio.scheduling import claim_due_profiles
 from django.utils import timezone
 
 User = get_user_model()
@@ -18,7 +22,17 @@ class Command(BaseCommand):
         parser.add_argument(
             '--all',
             action='store_true',
-            help='Sync data for all users with HCGateway integration enabled',
+            help='Sync data for all users with HCGateway integration enabled (queued on Celery)',
+        )
+        parser.add_argument(
+            '--due',
+            action='store_true',
+            help='Sync only users whose adaptive sync schedule is due (queued on Celery)',
+        )
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='With --all or --due, sync in this process instead of fanning out to Celery workers',
         )
         parser.add_argument(
             '--setup-user',
@@ -35,11 +49,19 @@ class Command(BaseCommand):
         elif options['user']:
             self.sync_user(options['user'])
         elif options['all']:
-            self.sync_all_users()
+            if options['inline']:
+                self.sync_batches_inline(get_sync_batches())
+            else:
+                self.queue_sync_run(sync_all_users_health_data())
+        elif options['due']:
+            if options['inline']:
+                self.sync_batches_inline(make_sync_batches(claim_due_profiles()), due=True)
+            else:
+                self.queue_sync_run(dispatch_due_health_syncs(), due=True)
         else:
             self.stdout.write(
                 self.style.ERROR(
-                    'Please specify --user <username>, --all, or --setup-user <username> <hc_user_id>'
+                    'Please specify --user <username>, --all, --due, or --setup-user <username> <hc_user_id>'
                 )
             )
 
@@ -53,6 +75,7 @@ class Command(BaseCommand):
         profile, created = UserProfile.objects.get_or_create(user=user)
         profile.hc_gateway_user_id = hc_user_id
         profile.sync_enabled = True
+        profile.next_sync_at = timezone.now()  # First scheduled sync on the next tick
         profile.save()
 
         if created:
@@ -99,54 +122,66 @@ class Command(BaseCommand):
                     f'{result["steps_records"]} activity, {result["weight_records"]} weight, {result["sleep_records"]} sleep'
                 )
             )
+            for key, timing in result.get('timings', {}).items():
+                self.stdout.write(
+                    f'  {key:<8} fetch {timing["fetch_seconds"]:.3f}s, write {timing["write_seconds"]:.3f}s '
+                    f'({timing["records_fetched"]} records fetched)'
+                )
         else:
             self.stdout.write(
                 self.style.ERROR(f'Failed to sync data for user "{username}"')
             )
 
-    def sync_all_users(self):
-        """Sync health data for all users with sync enabled"""
-        enabled_profiles = UserProfile.objects.filter(
-            sync_enabled=True,
-            hc_gateway_user_id__isnull=False
-        ).exclude(hc_gateway_user_id='')
+    def queue_sync_run(self, result, due=False):
+        """Report on a sync run fanned out to Celery workers"""
+        if result['errors']:
+            for error in result['errors']:
+                self.stdout.write(self.style.ERROR(error))
+            raise CommandError('Could not queue the sync run. Is the Celery broker reachable? Use --inline to sync without it.')
 
-        if not enabled_profiles.exists():
-            self.stdout.write(
-                self.style.WARNING(
-                    'No users found with HCGateway sync enabled. Use --setup-user to configure users first.'
-                )
+        if not result['total_users']:
+            self.no_users(due)
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Queued {result["users_queued"]} users in {result["batches"]} batches (run {result["run_id"]}).'
             )
+        )
+
+    def sync_batches_inline(self, batches, due=False):
+        """Sync batches of users in this process"""
+        if not batches:
+            self.no_users(due)
             return
 
-        self.stdout.write(f'Found {enabled_profiles.count()} users to sync...')
-        
-        successful_syncs = 0
-        for profile in enabled_profiles:
-            try:
-                self.stdout.write(f'Syncing user "{profile.user.username}"...')
-                result = sync_health_data_for_user(profile.user.id, profile.hc_gateway_user_id)
-                
-                if result:
-                    profile.last_sync = timezone.now()
-                    profile.save()
-                    successful_syncs += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'  Synced {result["total_records"]} records'
-                        )
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.ERROR(f'  Failed to sync user "{profile.user.username}"')
-                    )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'  Error syncing user "{profile.user.username}": {e}')
-                )
+        started_at = timezone.now().isoformat()
+        batch_results = []
+        for batch in batches:
+            self.stdout.write(f'Syncing batch of {len(batch)} users...')
+            batch_results.append(sync_health_data_batch(batch))
+
+        summary = summarize_sync_run(batch_results, started_at=started_at)
+        for user_id in summary['failed_user_ids']:
+            self.stdout.write(self.style.ERROR(f'  Failed to sync user {user_id}'))
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'Sync completed. Successfully synced {successful_syncs}/{enabled_profiles.count()} users.'
+                f'Sync completed. Successfully synced {summary["users_synced"]}/{summary["total_users"]} users '
+                f'({summary["total_records"]} new records).'
+            )
+        )
+        self.stdout.write(
+            f'  Time spent fetching {summary["fetch_seconds"]:.3f}s, writing {summary["write_seconds"]:.3f}s '
+            f'(summed over users; see /metrics for per-stage histograms)'
+        )
+
+    def no_users(self, due):
+        if due:
+            self.stdout.write('No users are due for a sync.')
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    'No users found with HCGateway sync enabled. Use --setup-user to configure users first.'
+                )
             )
-        )
\ No newline at end of file
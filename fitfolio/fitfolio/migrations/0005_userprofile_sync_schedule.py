@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitfolio', '0004_synccursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='idle_syncs',
+            field=models.PositiveIntegerField(default=0, help_text='Consecutive syncs that returned no new data'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='When the scheduler will next sync this user', null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='sync_interval',
+            field=models.PositiveIntegerField(default=7200, help_text='Seconds between syncs, adapted to how often new data arrives'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_brin_index(apps, schema_editor):
+    # Samples are appended roughly in time order, so on PostgreSQL a tiny
+    # BRIN index covers time range scans across all users; other databases
+    # rely on the (user, data_type, start) B-tree
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS fitfolio_healthsample_start_brin '
+            'ON fitfolio_healthsample USING brin ("start")'
+        )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS fitfolio_healthsample_start_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitfolio', '0006_metricrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HealthSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_type', models.CharField(choices=[('steps', 'Steps'), ('sleepSession', 'Sleep session')], max_length=32)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField(blank=True, null=True)),
+                ('value', models.FloatField(default=0.0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='health_samples', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'data_type', 'start')},
+            },
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
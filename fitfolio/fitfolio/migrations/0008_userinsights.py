@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitfolio', '0007_healthsample'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserInsights',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('current_step_streak', models.IntegerField(default=0)),
+                ('longest_step_streak', models.IntegerField(default=0)),
+                ('best_steps', models.IntegerField(blank=True, null=True)),
+                ('best_steps_date', models.DateField(blank=True, null=True)),
+                ('steps_avg_7', models.FloatField(blank=True, null=True)),
+                ('steps_avg_30', models.FloatField(blank=True, null=True)),
+                ('longest_sleep_minutes', models.IntegerField(blank=True, null=True)),
+                ('longest_sleep_date', models.DateField(blank=True, null=True)),
+                ('sleep_avg_7', models.FloatField(blank=True, null=True)),
+                ('sleep_avg_30', models.FloatField(blank=True, null=True)),
+                ('lowest_weight', models.FloatField(blank=True, null=True)),
+                ('lowest_weight_date', models.DateField(blank=True, null=True)),
+                ('weight_trend', models.FloatField(blank=True, null=True)),
+                ('weight_trend_per_week', models.FloatField(blank=True, null=True)),
+                ('compute_seconds', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='insights', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'User insights',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitfolio', '0008_userinsights'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='What the token is for, e.g. the uploading device', max_length=100)),
+                ('prefix', models.CharField(help_text='Start of the token, to recognise it without the secret', max_length=12)),
+                ('key_hash', models.CharField(max_length=64, unique=True)),
+                ('scopes', models.CharField(default='read write', help_text='Space-separated scopes', max_length=100)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Never expires when empty', null=True)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='api_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
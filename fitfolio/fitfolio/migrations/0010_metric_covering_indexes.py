@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# Covering indexes for the per-user time range reads (list/recent, summary,
+# chart series, dashboard, analytics): WHERE user_id = ? AND date >= ?
+# ORDER BY date DESC, id DESC (the list pagination order), reading only the
+# columns below. PostgreSQL keys them on (user_id, date DESC, id DESC) and
+# carries the values as INCLUDE payload; SQLite has no INCLUDE, so there the
+# values become trailing key columns. Either way the hot queries are
+# answered from the index alone.
+#
+# On PostgreSQL the indexes are built CONCURRENTLY, outside a transaction, so
+# syncs keep writing to these large tables during the build. A build that
+# was interrupted leaves an INVALID index behind; it is dropped and rebuilt.
+#
+# (name, table, included columns, partial index condition)
+COVERING_INDEXES = [
+    ('fitfolio_activity_user_date_cov', 'fitfolio_activitydata',
+     ['steps', 'distance', 'calories_burned'], None),
+    ('fitfolio_weight_user_date_cov', 'fitfolio_weightdata',
+     ['weight', 'created_at'], None),
+    ('fitfolio_sleep_user_date_cov', 'fitfolio_sleepdata',
+     ['total_sleep_minutes', 'sleep_quality_score'], None),
+    # Sleep summaries only count nights with data
+    ('fitfolio_sleep_nonempty_idx', 'fitfolio_sleepdata',
+     ['total_sleep_minutes'], 'total_sleep_minutes > 0'),
+]
+
+
+VENDORS = ('postgresql', 'sqlite')
+
+
+def _drop_invalid_index(schema_editor, name):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid '
+            'WHERE pg_class.relname = %s AND NOT pg_index.indisvalid', [name],
+        )
+        invalid = cursor.fetchone() is not None
+    if invalid:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(name)}')
+
+
+def create_covering_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in VENDORS:
+        return
+    quote = schema_editor.quote_name
+    for name, table, columns, condition in COVERING_INDEXES:
+        if vendor == 'postgresql':
+            _drop_invalid_index(schema_editor, name)
+            sql = (f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(name)} ON {quote(table)} '
+                   f'("user_id", "date" DESC, "id" DESC) INCLUDE ({", ".join(quote(c) for c in columns)})')
+        else:
+            sql = (f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+                   f'("user_id", "date" DESC, "id" DESC, {", ".join(quote(c) for c in columns)})')
+        if condition:
+            sql += f' WHERE {condition}'
+        schema_editor.execute(sql)
+
+
+def drop_covering_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in VENDORS:
+        return
+    concurrently = ' CONCURRENTLY' if vendor == 'postgresql' else ''
+    for name, _, _, _ in COVERING_INDEXES:
+        schema_editor.execute(f'DROP INDEX{concurrently} IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('fitfolio', '0009_apitoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_covering_indexes, drop_covering_indexes),
+    ]
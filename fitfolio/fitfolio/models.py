@@ -28,6 +28,12 @@ class UserProfile(models.Model):
     sync_enabled = models.BooleanField(default=False, 
                                       help_text="Enable automatic health data sync")
     last_sync = models.DateTimeField(null=True, blank=True)
+    next_sync_at = models.DateTimeField(null=True, blank=True, db_index=True,
+                                        help_text="When the scheduler will next sync this user")
+    sync_interval = models.PositiveIntegerField(default=7200,
+                                                help_text="Seconds between syncs, adapted to how often new data arrives")
+    idle_syncs = models.PositiveIntegerField(default=0,
+                                             help_text="Consecutive syncs that returned no new data")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -83,4 +89,116 @@ class SleepData(models.Model):
     def __str__(self):
         hours = self.total_sleep_minutes // 60
         minutes = self.total_sleep_minutes % 60
-        return f"{self.user.username} - {hours}h {minutes}m - {self.date}"
\ No newline at end of file
+        return f"{self.user.username} - {hours}h {minutes}m - {self.date}"
+
+class SyncCursor(models.Model):
+    """High-water mark of the newest HCGateway record synced per user and data type"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_cursors')
+    data_type = models.CharField(max_length=32)  # HCGateway data type, e.g. 'steps'
+    last_record_start = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'data_type')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.data_type} - {self.last_record_start}"
+
+
+class MetricRollup(models.Model):
+    """Pre-aggregated weekly/monthly statistics of one metric for a user"""
+    GRANULARITY_CHOICES = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rollups')
+    metric = models.CharField(max_length=16)  # 'activity', 'weight' or 'sleep'
+    granularity = models.CharField(max_length=8, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()  # Monday of the week or first day of the month
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0.0)
+    average = models.FloatField(default=0.0)
+    minimum = models.FloatField(null=True, blank=True)
+    maximum = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'metric', 'granularity', 'period_start')
+        ordering = ['period_start']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.metric} {self.granularity} of {self.period_start}"
+
+
+class HealthSample(models.Model):
+    """
+    Raw HCGateway record kept at its original resolution (e.g. an hour of
+    steps or one sleep session). Daily ActivityData/SleepData rows are
+    aggregated from these, see samples.py.
+    """
+    DATA_TYPE_CHOICES = [
+        ('steps', 'Steps'),
+        ('sleepSession', 'Sleep session'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='health_samples')
+    data_type = models.CharField(max_length=32, choices=DATA_TYPE_CHOICES)
+    start = models.DateTimeField()
+    end = models.DateTimeField(null=True, blank=True)
+    value = models.FloatField(default=0.0)  # Step count; minutes asleep for sleep sessions
+
+    class Meta:
+        # Also the B-tree index behind per-user time range scans
+        unique_together = ('user', 'data_type', 'start')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.data_type} - {self.start}: {self.value}"
+
+
+class UserInsights(models.Model):
+    """Derived per-user statistics, precomputed nightly by insights.py"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='insights')
+    as_of = models.DateField()
+    current_step_streak = models.IntegerField(default=0)  # Days in a row at or above the step goal
+    longest_step_streak = models.IntegerField(default=0)
+    best_steps = models.IntegerField(null=True, blank=True)
+    best_steps_date = models.DateField(null=True, blank=True)
+    steps_avg_7 = models.FloatField(null=True, blank=True)
+    steps_avg_30 = models.FloatField(null=True, blank=True)
+    longest_sleep_minutes = models.IntegerField(null=True, blank=True)
+    longest_sleep_date = models.DateField(null=True, blank=True)
+    sleep_avg_7 = models.FloatField(null=True, blank=True)
+    sleep_avg_30 = models.FloatField(null=True, blank=True)
+    lowest_weight = models.FloatField(null=True, blank=True)
+    lowest_weight_date = models.DateField(null=True, blank=True)
+    weight_trend = models.FloatField(null=True, blank=True)  # Smoothed (EWMA) current weight
+    weight_trend_per_week = models.FloatField(null=True, blank=True)
+    compute_seconds = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'User insights'
+
+    def __str__(self):
+        return f"{self.user.username} - insights as of {self.as_of}"
+
+
+class APIToken(models.Model):
+    """Personal API token; only a SHA-256 digest of the secret is stored"""
+    SCOPE_CHOICES = [
+        ('read', 'Read'),
+        ('write', 'Write'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, help_text="What the token is for, e.g. the uploading device")
+    prefix = models.CharField(max_length=12, help_text="Start of the token, to recognise it without the secret")
+    key_hash = models.CharField(max_length=64, unique=True)
+    scopes = models.CharField(max_length=100, default='read write', help_text="Space-separated scopes")
+    expires_at = models.DateTimeField(null=True, blank=True, help_text="Never expires when empty")
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name} ({self.prefix}...)"
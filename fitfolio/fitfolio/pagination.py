@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class MetricCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the per-user metric lists, newest first.
+
+    (user, date) is unique, so the cursor position on date identifies a row
+    exactly and each page is a range scan of the covering (user, date, id)
+    index (migration 0010) no matter how deep the client pages.
+    """
+    ordering = ('-date', '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
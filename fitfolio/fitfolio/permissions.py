@@ -0,0 +1,16 @@
+from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .authentication import TokenAuth
+
+
+class TokenHasScope(BasePermission):
+    """
+    API tokens need the 'read' scope for safe methods and 'write' for the
+    rest; session and Basic auth requests aren't restricted here
+    """
+    message = 'This API token does not have the required scope.'
+
+    def has_permission(self, request, view):
+        if not isinstance(request.auth, TokenAuth):
+            return True
+        required = 'read' if request.method in SAFE_METHODS else 'write'
+        return required in request.auth.scopes
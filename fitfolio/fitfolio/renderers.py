@@ -0,0 +1,83 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+import csv
+import json
+
+# Lines joined into each chunk handed to a StreamingHttpResponse
+STREAM_CHUNK_LINES = 500
+
+
+def _chunked(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= STREAM_CHUNK_LINES:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON, one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        """Encode an iterable of dicts lazily, in chunks of lines"""
+        return _chunked(json.dumps(row, cls=JSONEncoder) + '\n' for row in rows)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+
+class _LineBuffer:
+    """File-like object that hands back whatever csv.writer writes to it"""
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma-separated values with a header row"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        """Encode an iterable of lists (header first) lazily, in chunks of lines"""
+        writer = csv.writer(_LineBuffer())
+        return _chunked(writer.writerow(row) for row in rows)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        header = list(rows[0]) if rows else []
+        lines = [header] + [[row.get(name) for name in header] for row in rows]
+        return ''.join(self.stream(lines)).encode(self.charset)
+
+
+class BinaryRenderer(BaseRenderer):
+    """Raw bytes; anything else (such as an error) is rendered as JSON"""
+    media_type = 'application/octet-stream'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return bytes(data)
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Prometheus text exposition format; anything else (such as an error) is rendered as JSON"""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return JSONRenderer().render(data, renderer_context=renderer_context)
@@ -0,0 +1,90 @@
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.dispatch import receiver
+from datetime import timedelta
+from .bulk import bulk_upsert
+from .models import ActivityData, WeightData, SleepData, MetricRollup
+from .signals import metric_data_changed
+import logging
+
+logger = logging.getLogger(__name__)
+
+# metric name -> (model, value field that is rolled up)
+ROLLUP_METRICS = {
+    'activity': (ActivityData, 'steps'),
+    'weight': (WeightData, 'weight'),
+    'sleep': (SleepData, 'total_sleep_minutes'),
+}
+
+ROLLUP_FIELDS = ['count', 'total', 'average', 'minimum', 'maximum']
+
+GRANULARITIES = {
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start, granularity):
+    """Last day of the period beginning at `start`"""
+    if granularity == 'week':
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def refresh_rollups(user_id, metric, dates):
+    """
+    Recompute the weekly and monthly rollups containing `dates`.
+
+    One grouped aggregate query per granularity covers every touched period;
+    periods left without rows are deleted.
+    """
+    model, field = ROLLUP_METRICS[metric]
+    dates = set(dates)
+    if not dates:
+        return
+
+    for granularity, trunc in GRANULARITIES.items():
+        periods = {period_start(day, granularity) for day in dates}
+        first, last = min(periods), period_end(max(periods), granularity)
+
+        aggregates = (
+            model.objects.filter(user_id=user_id, date__range=(first, last))
+            .annotate(period=trunc('date'))
+            .values('period')
+            .order_by()
+            .annotate(
+                count=Count(field), total=Sum(field), average=Avg(field),
+                minimum=Min(field), maximum=Max(field),
+            )
+        )
+        rows = {}
+        for row in aggregates:
+            if row['period'] in periods and row['count']:
+                period = row.pop('period')
+                rows[period] = {name: row[name] for name in ROLLUP_FIELDS}
+
+        bulk_upsert(MetricRollup, user_id, rows, ROLLUP_FIELDS, key='period_start',
+                    scope={'metric': metric, 'granularity': granularity})
+        MetricRollup.objects.filter(
+            user_id=user_id, metric=metric, granularity=granularity,
+            period_start__in=periods - set(rows),
+        ).delete()
+
+
+def rebuild_rollups(user_id, metric):
+    """Recompute every rollup of a metric for a user from scratch"""
+    model, _ = ROLLUP_METRICS[metric]
+    MetricRollup.objects.filter(user_id=user_id, metric=metric).delete()
+    refresh_rollups(user_id, metric, model.objects.filter(user_id=user_id).values_list('date', flat=True))
+
+
+@receiver(metric_data_changed)
+def update_rollups_on_change(sender, user_id, metric, dates, **kwargs):
+    refresh_rollups(user_id, metric, dates)
@@ -0,0 +1,120 @@
+"""
+Primary/replica database routing
+
+Reads go to the primary unless code opts in with use_replica() (or the
+replica_read decorator / ReplicaReadMixin for views), so nothing reads a
+lagging replica by accident. Within an opted-in block, which for views
+spans the whole request:
+
+- writes always go to the primary, and after the first write every later
+  read in the block sticks to the primary too, so a request reads its own
+  writes;
+- a user whose data changed in the last DATABASE_REPLICA_LAG seconds is
+  read from the primary, so a write is visible to the next request even
+  while the replica catches up, and cached responses are never built
+  from rows older than their data version.
+
+Set DATABASE_REPLICA_READS (on when DATABASE_REPLICA_URL is set) to use
+the DATABASE_REPLICA_ALIAS connection.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import time
+from .caching import KEY_PREFIX
+from .signals import metric_data_changed
+
+PRIMARY = 'default'
+
+_read_alias = ContextVar('fitfolio_read_alias', default=None)
+_wrote = ContextVar('fitfolio_wrote', default=False)
+
+
+def replica_alias():
+    """Replica alias to read from, or None when every read goes to the primary"""
+    if not getattr(settings, 'DATABASE_REPLICA_READS', False):
+        return None
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def _last_write_key(user_id):
+    return f'{KEY_PREFIX}:last-write:{user_id}'
+
+
+def recently_wrote(user_id):
+    return cache.get(_last_write_key(user_id)) is not None
+
+
+@receiver(metric_data_changed)
+def remember_recent_write(sender, user_id, **kwargs):
+    lag = getattr(settings, 'DATABASE_REPLICA_LAG', 5)
+    cache.set(_last_write_key(user_id), time.time(), lag)
+
+
+@contextmanager
+def use_replica(user_id=None):
+    """Send reads in this block to the replica, unless user_id has just written"""
+    alias = replica_alias()
+    if alias and user_id is not None and recently_wrote(user_id):
+        alias = None
+    tokens = _read_alias.set(alias), _wrote.set(False)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(tokens[0])
+        _wrote.reset(tokens[1])
+
+
+def replica_read(view):
+    """Function view decorator: run the view's reads against the replica"""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        with use_replica(request.user.pk):
+            return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ReplicaReadMixin:
+    """Viewset mixin: actions named in replica_actions read from the replica"""
+    replica_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        # The block is entered in initial(), once the action and user are
+        # known, and always left here, even when the handler raises
+        self._replica = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica is not None:
+                replica, self._replica = self._replica, None
+                replica.__exit__(None, None, None)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica = use_replica(request.user.pk)
+            self._replica.__enter__()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _wrote.get():
+            return PRIMARY
+        return _read_alias.get() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        if _read_alias.get():
+            _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db != getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
@@ -0,0 +1,122 @@
+"""
+Raw intraday samples and the daily rows aggregated from them
+
+Synced steps records and sleep sessions are stored as HealthSample rows at
+their original resolution. After each write only the dates those samples
+fall on are re-aggregated into ActivityData (steps summed over the day) and
+SleepData (sessions starting that day), so several records on one day add
+up instead of overwriting each other.
+"""
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from .bulk import bulk_upsert, UpsertResult
+from .models import ActivityData, SleepData, HealthSample
+from . import instrumentation as metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_DATA_TYPES = {'steps', 'sleepSession'}
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def day_range(dates):
+    """Filter for samples starting between the first and last of `dates`, by index range"""
+    tz = timezone.get_current_timezone()
+    return {
+        'start__gte': timezone.make_aware(datetime.combine(min(dates), time.min), tz),
+        'start__lt': timezone.make_aware(datetime.combine(max(dates) + timedelta(days=1), time.min), tz),
+    }
+
+
+def parse_samples(data_type, records):
+    """Map HCGateway records to {start: {'end': ..., 'value': ...}}"""
+    samples = {}
+    for record in records:
+        try:
+            start = _parse_timestamp(record['start'])
+            end = _parse_timestamp(record['end']) if record.get('end') else None
+            if data_type == 'sleepSession':
+                value = (end - start).total_seconds() / 60
+            else:
+                value = float(record.get('count', 0))
+            samples[start] = {'end': end, 'value': value}
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Error processing {data_type} sample: {e}")
+            metrics.errors.inc(kind='record')
+            continue
+    return samples
+
+
+def store_samples(user, data_type, records):
+    """Upsert raw samples, returning the local dates of the samples that changed"""
+    samples = parse_samples(data_type, records)
+    result = bulk_upsert(HealthSample, user, samples, ['end', 'value'], key='start',
+                         scope={'data_type': data_type}, skip_unchanged=True)
+    return sorted({timezone.localtime(start).date() for start in result.created + result.updated})
+
+
+def aggregate_steps(user, dates):
+    """Recompute daily ActivityData for `dates` from the steps samples"""
+    user_id = getattr(user, 'pk', user)
+    dates = set(dates)
+    totals = (
+        HealthSample.objects.filter(user_id=user_id, data_type='steps', **day_range(dates))
+        .annotate(day=TruncDate('start'))
+        .values('day')
+        .annotate(steps=Sum('value'))
+        .order_by()
+    )
+    rows = {}
+    for row in totals:
+        if row['day'] not in dates:
+            continue
+        steps = int(row['steps'])
+        rows[row['day']] = {
+            'steps': steps,
+            'distance': steps * 0.0008,  # Rough estimate: 0.8m per step
+            'calories_burned': int(steps * 0.04),  # Rough estimate
+        }
+    return bulk_upsert(ActivityData, user_id, rows, ['steps', 'distance', 'calories_burned'])
+
+
+def aggregate_sleep(user, dates):
+    """Recompute daily SleepData for `dates` from the sleep sessions starting on them"""
+    user_id = getattr(user, 'pk', user)
+    dates = set(dates)
+    sessions = (
+        HealthSample.objects.filter(user_id=user_id, data_type='sleepSession', **day_range(dates))
+        .order_by('start')
+        .values_list('start', 'end', 'value')
+    )
+    rows = {}
+    for start, end, minutes in sessions:
+        day = timezone.localtime(start).date()
+        if day not in dates:
+            continue
+        row = rows.setdefault(day, {'sleep_start': start, 'sleep_end': end, 'total_sleep_minutes': 0})
+        if end is not None and (row['sleep_end'] is None or end > row['sleep_end']):
+            row['sleep_end'] = end
+        row['total_sleep_minutes'] += minutes
+    for row in rows.values():
+        row['total_sleep_minutes'] = int(row['total_sleep_minutes'])
+    return bulk_upsert(SleepData, user_id, rows, ['sleep_start', 'sleep_end', 'total_sleep_minutes'])
+
+
+AGGREGATORS = {
+    'steps': aggregate_steps,
+    'sleepSession': aggregate_sleep,
+}
+
+
+def store_and_aggregate(user, data_type, records):
+    """Store raw samples, then refresh the daily rows of the dates they touch"""
+    dates = store_samples(user, data_type, records)
+    if not dates:
+        return UpsertResult([], [])
+    return AGGREGATORS[data_type](user, dates)
@@ -0,0 +1,113 @@
+"""
+Adaptive HCGateway sync scheduling
+
+Each UserProfile carries its own sync interval. A sync that brings in new
+data halves the interval (down to HEALTH_SYNC_MIN_INTERVAL); a sync that
+brings in nothing doubles it (up to HEALTH_SYNC_MAX_INTERVAL), unless it
+failed: an HCGateway outage must not back everyone off. Due times are
+jittered and first slots are staggered by user id so users spread across
+the interval instead of all landing on the same scheduler tick.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
+from .models import UserProfile
+import random
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def next_interval(current, new_records):
+    """Halve the interval after a productive sync, double it after an idle one"""
+    min_interval = _setting('HEALTH_SYNC_MIN_INTERVAL', 900)
+    max_interval = _setting('HEALTH_SYNC_MAX_INTERVAL', 86400)
+    if new_records > 0:
+        return max(min_interval, current // 2)
+    return min(max_interval, current * 2)
+
+
+def stagger_offset(user_id, interval):
+    """Stable per-user offset into the interval (Knuth multiplicative hash)"""
+    return (user_id * 2654435761) % max(1, interval)
+
+
+def jittered(interval):
+    """Interval +/- HEALTH_SYNC_JITTER so rescheduled users drift apart"""
+    jitter = _setting('HEALTH_SYNC_JITTER', 0.1)
+    return int(interval * (1 + random.uniform(-jitter, jitter)))
+
+
+def enabled_profiles():
+    return (
+        UserProfile.objects.filter(sync_enabled=True, hc_gateway_user_id__isnull=False)
+        .exclude(hc_gateway_user_id='')
+    )
+
+
+def claim_due_profiles(now=None):
+    """
+    Return (user_id, hc_user_id) pairs that are due for a sync.
+
+    Claimed users are pushed one interval ahead straight away so an
+    overlapping tick (beat and the health-sync container, say) can't
+    dispatch them twice; record_sync_results sets the real next slot.
+    Users that have never been scheduled get a staggered first slot.
+    """
+    now = now or timezone.now()
+    due = []
+
+    with transaction.atomic():
+        profiles = list(
+            enabled_profiles()
+            .select_for_update(skip_locked=True)
+            .filter(next_sync_at__isnull=True)
+            .only('id', 'user_id', 'sync_interval', 'next_sync_at')
+        )
+        for profile in profiles:
+            profile.next_sync_at = now + timedelta(seconds=stagger_offset(profile.user_id, profile.sync_interval))
+        UserProfile.objects.bulk_update(profiles, ['next_sync_at'])
+
+        profiles = list(
+            enabled_profiles()
+            .select_for_update(skip_locked=True)
+            .filter(next_sync_at__lte=now)
+            .order_by('next_sync_at')
+            .only('id', 'user_id', 'hc_gateway_user_id', 'sync_interval', 'next_sync_at')
+        )
+        for profile in profiles:
+            profile.next_sync_at = now + timedelta(seconds=profile.sync_interval)
+            due.append((profile.user_id, profile.hc_gateway_user_id))
+        UserProfile.objects.bulk_update(profiles, ['next_sync_at'])
+
+    return due
+
+
+def record_sync_results(new_records_by_user, failed_user_ids=(), now=None):
+    """
+    Adapt each user's interval to how much new data their last sync returned
+
+    Users in `failed_user_ids` whose sync (or any of its fetches) failed and
+    brought in nothing keep their interval and idle count and are retried
+    one interval from now; their last_sync is left alone.
+    """
+    failed_user_ids = set(failed_user_ids)
+    user_ids = set(new_records_by_user) | failed_user_ids
+    if not user_ids:
+        return
+
+    now = now or timezone.now()
+    profiles = list(
+        UserProfile.objects.filter(user_id__in=list(user_ids))
+        .only('id', 'user_id', 'sync_interval', 'idle_syncs', 'next_sync_at', 'last_sync')
+    )
+    for profile in profiles:
+        new_records = new_records_by_user.get(profile.user_id, 0)
+        if new_records or profile.user_id not in failed_user_ids:
+            profile.sync_interval = next_interval(profile.sync_interval, new_records)
+            profile.idle_syncs = 0 if new_records else profile.idle_syncs + 1
+            profile.last_sync = now
+        profile.next_sync_at = now + timedelta(seconds=jittered(profile.sync_interval))
+    UserProfile.objects.bulk_update(profiles, ['sync_interval', 'idle_syncs', 'next_sync_at', 'last_sync'])
@@ -1,24 +1,47 @@
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
-from .models import User, ActivityData, WeightData, SleepData
+from .models import User, ActivityData, WeightData, SleepData, MetricRollup
+
+def format_sleep_duration(minutes):
+    """Format sleep duration as 'Xh Ym'"""
+    if minutes:
+        return f"{minutes // 60}h {minutes % 60}m"
+    return "0h 0m"
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'date_joined']
 
-class ActivityDataSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Limit output to the comma-separated ?fields= of the request, when given.
+    Input is never trimmed, so a write with ?fields= still saves every field.
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request is not None else None
+        if not requested:
+            return data
+        keep = {name.strip() for name in requested.split(',')}
+        return {name: value for name, value in data.items() if name in keep}
+
+class ActivityDataSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ActivityData
         fields = ['id', 'date', 'steps', 'distance', 'calories_burned', 'user']
         read_only_fields = ['user']
 
-class WeightDataSerializer(serializers.ModelSerializer):
+class WeightDataSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = WeightData
         fields = ['id', 'date', 'weight', 'created_at', 'user']
         read_only_fields = ['user', 'created_at']
 
-class SleepDataSerializer(serializers.ModelSerializer):
+class SleepDataSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     sleep_duration_formatted = serializers.SerializerMethodField()
 
     class Meta:
@@ -33,8 +56,107 @@ class SleepDataSerializer(serializers.ModelSerializer):
 
     def get_sleep_duration_formatted(self, obj):
         """Format sleep duration as 'Xh Ym'"""
-        if obj.total_sleep_minutes:
-            hours = obj.total_sleep_minutes // 60
-            minutes = obj.total_sleep_minutes % 60
-            return f"{hours}h {minutes}m"
-        return "0h 0m"
+        return format_sleep_duration(obj.total_sleep_minutes)
+
+
+class MetricRollupSerializer(serializers.ModelSerializer):
+    sum = serializers.FloatField(source='total')
+    avg = serializers.FloatField(source='average')
+    min = serializers.FloatField(source='minimum')
+    max = serializers.FloatField(source='maximum')
+
+    class Meta:
+        model = MetricRollup
+        fields = ['period_start', 'count', 'sum', 'avg', 'min', 'max']
+
+
+def _date_column(values):
+    return [value.isoformat() if value is not None else None for value in values]
+
+def _datetime_column(values):
+    # Same output as DRF's DateTimeField with the ISO 8601 format
+    tz = timezone.get_current_timezone()
+    output = []
+    for value in values:
+        if value is None:
+            output.append(None)
+            continue
+        if value.tzinfo is not tz:
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        output.append(value[:-6] + 'Z' if value.endswith('+00:00') else value)
+    return output
+
+def _sleep_duration_column(values):
+    return [f"{m // 60}h {m % 60}m" if m else "0h 0m" for m in values]
+
+class FastReadSerializer:
+    """
+    Read-only fast path for large lists of a ModelSerializer's rows.
+
+    Reads only the needed columns with values()/values_list() and builds the
+    output column by column, without per-row to_representation calls. Output
+    matches the wrapped serializer, including ?fields= sparse fieldsets and
+    the computed fields listed in COMPUTED_FIELDS. Fields in required_fields
+    are output even when ?fields= leaves them out.
+    """
+    # output field -> (source column, function mapping that column's values)
+    COMPUTED_FIELDS = {
+        'sleep_duration_formatted': ('total_sleep_minutes', _sleep_duration_column),
+    }
+
+    def __init__(self, serializer_class, request=None, required_columns=(), required_fields=()):
+        model = serializer_class.Meta.model
+        names = list(serializer_class.Meta.fields)
+        requested = request.query_params.get('fields') if request is not None else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',')}.union(required_fields)
+            names = [name for name in names if name in keep]
+
+        self.names = names
+        self.plan = []  # (output name, column, converter)
+        columns = list(required_columns)
+        for name in names:
+            if name in self.COMPUTED_FIELDS:
+                column, converter = self.COMPUTED_FIELDS[name]
+            else:
+                field = model._meta.get_field(name)
+                column = field.attname
+                if isinstance(field, models.DateTimeField):
+                    converter = _datetime_column
+                elif isinstance(field, models.DateField):
+                    converter = _date_column
+                else:
+                    converter = None
+            self.plan.append((name, column, converter))
+            if column not in columns:
+                columns.append(column)
+        self.columns = columns
+
+    def _output_columns(self, values_by_column):
+        output = []
+        for name, column, converter in self.plan:
+            values = values_by_column[column]
+            output.append(values if converter is None else converter(values))
+        return output
+
+    def _rows(self, values_by_column, count):
+        if not self.plan:
+            # ?fields= matched nothing: one empty object per row, like the DRF serializer
+            return [{} for _ in range(count)]
+        return [dict(zip(self.names, values)) for values in zip(*self._output_columns(values_by_column))]
+
+    def from_tuples(self, rows):
+        """Serialize values_list(*self.columns) rows"""
+        rows = list(rows)
+        values_by_column = dict(zip(self.columns, map(list, zip(*rows)))) if rows else \
+            {column: [] for column in self.columns}
+        return self._rows(values_by_column, len(rows))
+
+    def from_dicts(self, rows):
+        """Serialize values(*self.columns) rows, e.g. a paginated page"""
+        values_by_column = {column: [row[column] for row in rows] for column in self.columns}
+        return self._rows(values_by_column, len(rows))
+
+    def serialize(self, queryset):
+        return self.from_tuples(queryset.values_list(*self.columns))
@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
+from celery.schedules import crontab
+from fitfolio.database import parse_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -74,12 +77,53 @@ WSGI_APPLICATION = 'fitfolio.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# DATABASE_URL selects the backend (see fitfolio/database.py), e.g.
+# postgres://fitfolio:secret@db:5432/fitfolio or sqlite:///db.sqlite3
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))  # Seconds a Postgres connection is reused
+DB_CONN_HEALTH_CHECKS = True  # Ping reused connections before each request/task
+SQLITE_BUSY_TIMEOUT = 20  # Seconds a SQLite writer waits for the write lock
+
+# Read replica for dashboard/API reads and batch analytics (see fitfolio/routers.py).
+# Without DATABASE_REPLICA_URL the alias points at the primary and is unused,
+# but it still exists so replica routing can be tested locally.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_REPLICA_READS = bool(DATABASE_REPLICA_URL)  # Route opted-in reads to the replica
+DATABASE_REPLICA_LAG = 5  # Seconds after a user's write during which their reads stay on the primary
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': parse_database_url(DATABASE_URL, BASE_DIR, DB_CONN_MAX_AGE, SQLITE_BUSY_TIMEOUT),
+    DATABASE_REPLICA_ALIAS: {
+        **parse_database_url(DATABASE_REPLICA_URL or DATABASE_URL, BASE_DIR, DB_CONN_MAX_AGE, SQLITE_BUSY_TIMEOUT),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+DATABASE_ROUTERS = ['fitfolio.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# Redis (shared by web and Celery processes) when CACHE_URL is set, otherwise
+# a per-process in-memory cache
+
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+CHART_SERIES_TIMEOUT = 7 * 86400  # Seconds an unread chart series blob stays cached
+RESPONSE_CACHE_TIMEOUT = 3600  # Seconds a cached /recent/ or /summary/ response lives
+METRICS_ENABLED = True  # Record sync pipeline metrics in the cache (served at /metrics)
 
 
 # Password validation
@@ -136,17 +180,63 @@ OAUTH_TOKENS = {
 
 # HCGateway Configuration
 HCGATEWAY_API_URL = 'https://api.hcgateway.shuchir.dev'  # Can be overridden for self-hosted instances
+HCGATEWAY_PAGE_SIZE = 500  # Records requested per page when paging past the sync cursor
+HCGATEWAY_MAX_PAGES = 20  # Pages fetched per data type per sync; larger backlogs continue next sync
+HCGATEWAY_INITIAL_SYNC_START = '1970-01-01T00:00:00+00:00'  # Where a user's first sync starts
+HCGATEWAY_TIMEOUT = 30  # Seconds per request
+HCGATEWAY_POOL_SIZE = 10  # Keep-alive connections per worker process
+HCGATEWAY_MAX_RETRIES = 3  # Retries on connection errors and 429/5xx responses
+HCGATEWAY_RETRY_BACKOFF = 0.5  # Exponential backoff factor between retries, in seconds
+HCGATEWAY_FETCH_CONCURRENCY = 3  # Data types fetched in parallel per user sync
+
+# Celery
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
+CELERY_WORKER_CONCURRENCY = int(os.environ.get('CELERY_WORKER_CONCURRENCY', 4))
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Don't let one worker hoard sync batches
+CELERY_TASK_ACKS_LATE = True
+
+# Health data sync fan-out and adaptive scheduling
+HEALTH_SYNC_BATCH_SIZE = 25  # Users synced sequentially per Celery task
+HEALTH_SYNC_TICK = 300  # Seconds between scheduler runs looking for due users
+HEALTH_SYNC_MIN_INTERVAL = 900  # Most frequent sync for users with steady new data
+HEALTH_SYNC_MAX_INTERVAL = 86400  # Least frequent sync for idle users
+HEALTH_SYNC_JITTER = 0.1  # Random +/- fraction applied to each next sync time
+
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-due-health-syncs': {
+        'task': 'fitfolio.tasks.dispatch_due_health_syncs',
+        'schedule': HEALTH_SYNC_TICK,
+    },
+    'compute-nightly-insights': {
+        'task': 'fitfolio.tasks.compute_nightly_insights',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
 
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'fitfolio.authentication.APITokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
+        'fitfolio.permissions.TokenHasScope',
     ],
 }
+API_TOKEN_CACHE_TIMEOUT = 300  # Seconds a verified token stays in the shared cache
+API_TOKEN_LOCAL_TTL = 30  # Seconds a process trusts its in-memory copy (bounds revocation delay)
+API_TOKEN_LRU_SIZE = 1024  # Tokens kept in each process's in-memory LRU
+API_TOKEN_USAGE_INTERVAL = 3600  # Seconds between last_used_at writes per token
+METRIC_BULK_MAX_RECORDS = 1000  # Records accepted per /api/<metric>/bulk/ request
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip while streaming an export
+ANALYTICS_WEIGHT_ALPHA = 0.1  # Smoothing factor of the exponentially weighted weight trend
+HEALTH_DUMP_BATCH_SIZE = 5000  # Dump records parsed and upserted per batch on import
+HEALTH_DUMP_MAX_RECORD_SIZE = 1024 * 1024  # Characters one dump record may span before the import is rejected
+INSIGHTS_CHUNK_SIZE = 200  # Users whose insights are loaded, computed and written together
+INSIGHTS_STEP_GOAL = 10000  # Daily steps that count towards a step streak
 
 # Logging configuration
 LOGGING = {
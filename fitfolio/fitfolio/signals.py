@@ -0,0 +1,12 @@
+from django.dispatch import Signal
+
+# Sent whenever a user's ActivityData, WeightData or SleepData rows change,
+# including bulk writes that bypass post_save. Arguments: user_id, metric
+# ('activity', 'weight' or 'sleep') and dates, the affected dates.
+metric_data_changed = Signal()
+
+
+def notify_metric_data_changed(sender, user_id, metric, dates):
+    dates = set(dates)
+    if dates:
+        metric_data_changed.send(sender=sender, user_id=user_id, metric=metric, dates=dates)
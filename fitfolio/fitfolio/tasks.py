@@ -1,7 +1,14 @@
-from celery import shared_task
+from celery import shared_task, group, chord
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import date
 from .api_clients import sync_user_health_data
+from .insights import insight_user_ids, make_chunks, compute_insights_chunk, summarize_insights_run
+from .scheduling import enabled_profiles, claim_due_profiles, record_sync_results
+from . import instrumentation as metrics
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -13,43 +20,193 @@ def sync_health_data_for_user(user_id, hc_user_id):
     """
     try:
         summary = sync_user_health_data(user_id, hc_user_id)
-        logger.info(f"Health data sync completed for user {user_id}: {summary}")
-        return summary
     except Exception as e:
         logger.error(f"Health data sync failed for user {user_id}: {e}")
+        metrics.errors.inc(kind='sync')
+        metrics.users_synced.inc(result='failed')
         raise
+    metrics.users_synced.inc(result='succeeded' if summary else 'failed')
+    return summary
+
+def make_sync_batches(pairs, batch_size=None):
+    """Split (user_id, hc_user_id) pairs into HEALTH_SYNC_BATCH_SIZE-sized batches"""
+    batch_size = batch_size or getattr(settings, 'HEALTH_SYNC_BATCH_SIZE', 25)
+    pairs = list(pairs)
+    return [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+
+def get_sync_batches(batch_size=None):
+    """Split users with HCGateway sync enabled into (user_id, hc_user_id) batches"""
+    pairs = enabled_profiles().order_by('user_id').values_list('user_id', 'hc_gateway_user_id')
+    return make_sync_batches(pairs, batch_size)
+
+@shared_task
+def sync_health_data_batch(batch):
+    """
+    Sync a batch of (user_id, hc_user_id) pairs one after another
+    Returns per-batch totals for summarize_sync_run
+    """
+    started = time.perf_counter()
+    succeeded = []
+    failed = []
+    total_records = 0
+    total_updated = 0
+    fetch_seconds = 0.0
+    write_seconds = 0.0
+    new_records_by_user = {}
+    fetch_failed = set()
+
+    for user_id, hc_user_id in batch:
+        try:
+            summary = sync_user_health_data(user_id, hc_user_id)
+        except Exception as e:
+            logger.error(f"Health data sync failed for user {user_id}: {e}")
+            metrics.errors.inc(kind='sync')
+            summary = None
+
+        if summary:
+            succeeded.append(user_id)
+            total_records += summary['total_records']
+            total_updated += summary['total_updated']
+            new_records_by_user[user_id] = summary['total_records'] + summary['total_updated']
+            if summary.get('fetch_errors'):
+                fetch_failed.add(user_id)
+            for timing in summary.get('timings', {}).values():
+                fetch_seconds += timing['fetch_seconds']
+                write_seconds += timing['write_seconds']
+        else:
+            failed.append(user_id)
+        metrics.users_synced.inc(result='succeeded' if summary else 'failed')
+
+    # Stamps last_sync and adapts each user's sync interval in one bulk update;
+    # users whose sync or fetches failed keep their interval
+    record_sync_results(new_records_by_user, failed_user_ids=fetch_failed.union(failed))
+
+    return {
+        'users': len(batch),
+        'succeeded': succeeded,
+        'failed': failed,
+        'total_records': total_records,
+        'total_updated': total_updated,
+        'fetch_seconds': fetch_seconds,
+        'write_seconds': write_seconds,
+        'seconds': time.perf_counter() - started,
+    }
+
+@shared_task
+def summarize_sync_run(batch_results, started_at=None):
+    """Chord callback: combine batch results into one run summary"""
+    summary = {
+        'batches': len(batch_results),
+        'total_users': sum(r['users'] for r in batch_results),
+        'users_synced': sum(len(r['succeeded']) for r in batch_results),
+        'failed_user_ids': [user_id for r in batch_results for user_id in r['failed']],
+        'total_records': sum(r['total_records'] for r in batch_results),
+        'total_updated': sum(r['total_updated'] for r in batch_results),
+        'busiest_batch_seconds': round(max((r['seconds'] for r in batch_results), default=0.0), 3),
+        # Summed over users; fetches of one user's data types overlap
+        'fetch_seconds': round(sum(r.get('fetch_seconds', 0.0) for r in batch_results), 3),
+        'write_seconds': round(sum(r.get('write_seconds', 0.0) for r in batch_results), 3),
+        'started_at': started_at,
+        'finished_at': timezone.now().isoformat(),
+    }
+    logger.info(f"Health data sync run completed: {summary}")
+    return summary
+
+def dispatch_sync_run(batches):
+    """
+    Queue batches as a chord of sync_health_data_batch tasks
+
+    The run spreads across every available Celery worker, and
+    summarize_sync_run aggregates the results once all batches finish.
+    """
+    total_users = sum(len(batch) for batch in batches)
+    errors = []
+    run_id = None
+
+    if batches:
+        try:
+            header = group(sync_health_data_batch.s(batch) for batch in batches)
+            result = chord(header)(summarize_sync_run.s(started_at=timezone.now().isoformat()))
+            run_id = result.id
+        except Exception as e:
+            error_msg = f"Failed to queue health data sync run: {e}"
+            logger.error(error_msg)
+            errors.append(error_msg)
+
+    return {
+        'users_queued': 0 if errors else total_users,
+        'batches': len(batches),
+        'run_id': run_id,
+        'errors': errors,
+        'total_users': total_users
+    }
 
 @shared_task
 def sync_all_users_health_data():
     """
     Sync health data for all users who have HCGateway user IDs configured
     """
-    # In a real implementation, you'd have a UserProfile model with hc_user_id
-    # For MVP, we'll create a simple mapping
-    users_synced = 0
+    return dispatch_sync_run(get_sync_batches())
+
+@shared_task
+def dispatch_due_health_syncs():
+    """
+    Scheduler tick (see CELERY_BEAT_SCHEDULE): sync only the users whose
+    adaptive next_sync_at has passed
+    """
+    return dispatch_sync_run(make_sync_batches(claim_due_profiles()))
+
+@shared_task
+def compute_insights_chunk_task(user_ids, today=None):
+    """Compute and store UserInsights for one chunk of users"""
+    return compute_insights_chunk(user_ids, date.fromisoformat(today) if today else None)
+
+@shared_task
+def summarize_insights_chunks(chunk_results, started_at=None):
+    """Chord callback: combine chunk timings into one run summary"""
+    summary = summarize_insights_run(chunk_results)
+    summary['started_at'] = started_at
+    summary['finished_at'] = timezone.now().isoformat()
+    return summary
+
+def dispatch_insights_run(chunks, today=None):
+    """
+    Queue chunks as a chord of compute_insights_chunk_task tasks
+
+    Chunks share nothing, so the run scales with the number of Celery
+    worker processes; summarize_insights_chunks logs the timings.
+    """
+    today = (today or date.today()).isoformat()
+    total_users = sum(len(chunk) for chunk in chunks)
     errors = []
-    
-    # This is a placeholder - in production you'd have a proper user mapping
-    user_hc_mappings = [
-        # (django_user_id, hc_gateway_user_id)
-        # Example: (1, "hc_user_123")
-    ]
-    
-    for user_id, hc_user_id in user_hc_mappings:
+    run_id = None
+
+    if chunks:
         try:
-            sync_health_data_for_user.delay(user_id, hc_user_id)
-            users_synced += 1
+            header = group(compute_insights_chunk_task.s(chunk, today) for chunk in chunks)
+            result = chord(header)(summarize_insights_chunks.s(started_at=timezone.now().isoformat()))
+            run_id = result.id
         except Exception as e:
-            error_msg = f"Failed to queue sync for user {user_id}: {e}"
+            error_msg = f"Failed to queue insights run: {e}"
             logger.error(error_msg)
             errors.append(error_msg)
-    
+
     return {
-        'users_queued': users_synced,
+        'users_queued': 0 if errors else total_users,
+        'chunks': len(chunks),
+        'run_id': run_id,
         'errors': errors,
-        'total_users': len(user_hc_mappings)
+        'total_users': total_users
     }
 
+@shared_task
+def compute_nightly_insights():
+    """
+    Nightly run (see CELERY_BEAT_SCHEDULE): precompute insights for every
+    user with sync enabled
+    """
+    return dispatch_insights_run(make_chunks(insight_user_ids()))
+
 # Legacy task (updated to use new system)
 @shared_task
 def update_health_data():
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+import numpy as np
+from ..models import User, ActivityData, WeightData, SleepData
+from ..analytics import analyze, ewma, rolling_mean
+from ..timeseries import epoch_day
+
+class AnalyticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_vectorised_helpers_match_their_definitions(self):
+        values = np.array([80.0, 81.0, np.nan, 79.0, 78.5] * 120)
+        measured = values[~np.isnan(values)]
+        expected, smoothed = [], measured[0]
+        for value in measured:
+            smoothed = 0.9 * smoothed + 0.1 * value
+            expected.append(smoothed)
+        np.testing.assert_allclose(ewma(measured, 0.1), expected)
+
+        means = rolling_mean(values, 3)
+        self.assertEqual(means[0], np.mean([80.0, 81.0]))
+        self.assertEqual(means[1], np.mean([81.0, 79.0]))
+        self.assertEqual(len(means), len(values) - 2)
+
+    def test_analyze(self):
+        today = date(2025, 3, 31)
+        days = np.arange(epoch_day(today) - 59, epoch_day(today) + 1)
+        steps = 5000.0 + 100 * (days % 7)
+        series = {
+            'activity': (days, steps),
+            'weight': (days[::3], np.linspace(85, 80, len(days[::3]))),
+            'sleep': (days, 300 + steps / 50),
+        }
+        result = analyze(series, today, 30)
+
+        self.assertEqual(len(result['dates']), 30)
+        self.assertEqual(result['activity']['rolling_7'][-1], 5300.0)
+        self.assertEqual(result['correlation']['steps_sleep'], {'r': 1.0, 'days': 30})
+        self.assertLess(result['weight']['trend_per_week'], 0)
+        self.assertIsNotNone(result['weight']['trend'][0])
+        # The window starts on Sunday 2 March, in the week of Monday 24 February
+        self.assertEqual(result['weekly']['weeks'][0], '2025-02-24')
+        self.assertEqual(len(result['weekly']['activity']['delta']), len(result['weekly']['weeks']))
+
+        series['weight'] = (np.empty(0, dtype=np.int64), np.empty(0))
+        self.assertEqual(analyze(series, today, 30)['weight']['trend'], [None] * 30)
+
+    def test_endpoint_is_memoised_until_data_changes(self):
+        today = date.today()
+        for i in range(14):
+            day = today - timedelta(days=i)
+            ActivityData.objects.create(user=self.user, date=day, steps=6000 + i)
+            SleepData.objects.create(user=self.user, date=day, total_sleep_minutes=400 + i)
+        WeightData.objects.create(user=self.user, date=today, weight=80.0)
+
+        first = self.client.get('/api/analytics/?days=30').json()
+        self.assertEqual(first['correlation']['steps_sleep']['r'], 1.0)
+        with self.assertNumQueries(0):
+            self.client.get('/api/analytics/?days=30')
+
+        self.client.post('/api/weight/', {'date': (today - timedelta(days=1)).isoformat(), 'weight': 82.0},
+                         format='json')
+        second = self.client.get('/api/analytics/?days=30').json()
+        self.assertNotEqual(first['weight']['trend'], second['weight']['trend'])
+        self.assertEqual(self.client.get('/api/analytics/?days=5').status_code, 400)
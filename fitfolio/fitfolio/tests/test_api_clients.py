@@ -9,3 +9,102 @@ class ApiClientsTest(TestCase):
         mock_post.return_value.json.return_value = {'data': 'some data'}
         data = fetch_google_fit_data()
         self.assertEqual(data, {'data': 'some data'})
+
+class IncrementalSyncTest(TestCase):
+    def setUp(self):
+        from ..models import User
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    @override_settings(HCGATEWAY_PAGE_SIZE=2, HCGATEWAY_MAX_PAGES=5)
+    @patch('fitfolio.api_clients.get_hcgateway_data')
+    def test_pages_forward_and_advances_cursor(self, mock_fetch):
+        from ..api_clients import sync_steps_data
+        from ..models import SyncCursor, ActivityData
+        mock_fetch.side_effect = [
+            {'data': [{'start': '2025-01-01T08:00:00Z', 'count': 10},
+                      {'start': '2025-01-02T08:00:00Z', 'count': 20}]},
+            {'data': [{'start': '2025-01-03T08:00:00Z', 'count': 30}]},
+        ]
+        result = sync_steps_data(self.user, 'hc_user')
+        self.assertEqual(result.created_count, 3)
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertEqual(ActivityData.objects.filter(user=self.user).count(), 3)
+
+        cursor = SyncCursor.objects.get(user=self.user, data_type='steps')
+        self.assertEqual(cursor.last_record_start.isoformat(), '2025-01-03T08:00:00+00:00')
+
+        # The next sync only asks for records after the stored high-water mark
+        mock_fetch.side_effect = [{'data': []}]
+        sync_steps_data(self.user, 'hc_user')
+        self.assertEqual(mock_fetch.call_args.kwargs['since'], cursor.last_record_start)
+
+    @override_settings(HCGATEWAY_PAGE_SIZE=2, HCGATEWAY_MAX_PAGES=5)
+    @patch('fitfolio.api_clients.get_hcgateway_data')
+    def test_records_at_the_cursor_are_read_again(self, mock_fetch):
+        from ..api_clients import sync_weight_data
+        from ..models import WeightData
+        boundary = {'start': '2025-01-01T08:00:00Z', 'weight': 80.0}
+        mock_fetch.side_effect = [{'data': [boundary]}]
+        sync_weight_data(self.user, 'hc_user')
+
+        # The inclusive bound returns the stored record again: nothing changes
+        mock_fetch.side_effect = [{'data': [boundary]}]
+        result = sync_weight_data(self.user, 'hc_user')
+        self.assertEqual((result.created_count, result.updated_count), (0, 0))
+
+        # A late upload sharing the cursor's timestamp is picked up; a full
+        # page that doesn't move the cursor ends the sync
+        mock_fetch.side_effect = [{'data': [boundary, dict(boundary, weight=79.5)]}]
+        result = sync_weight_data(self.user, 'hc_user')
+        self.assertEqual(result.updated_count, 1)
+        self.assertEqual(mock_fetch.call_count, 3)
+        self.assertEqual(WeightData.objects.get(user=self.user).weight, 79.5)
+
+    @patch('fitfolio.api_clients.get_hcgateway_session')
+    def test_cursor_bound_is_inclusive(self, mock_session):
+        from datetime import datetime, timezone
+        from ..api_clients import get_hcgateway_data
+        mock_session.return_value.post.return_value.status_code = 200
+        mock_session.return_value.post.return_value.json.return_value = {'data': []}
+        get_hcgateway_data('hc_user', 'steps', since=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        queries = mock_session.return_value.post.call_args.kwargs['json']['queries']
+        self.assertIn('greaterThanEqual(start, 2025-01-01T00:00:00+00:00)', queries)
+
+class HCGatewaySessionTest(TestCase):
+    def test_session_is_reused_and_retries_server_errors(self):
+        from ..api_clients import get_hcgateway_session
+        session = get_hcgateway_session()
+        self.assertIs(get_hcgateway_session(), session)
+
+        adapter = session.get_adapter('https://api.hcgateway.shuchir.dev')
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertIn('POST', adapter.max_retries.allowed_methods)
+        self.assertIn('gzip', session.headers['Accept-Encoding'])
+
+    @patch('fitfolio.api_clients.get_hcgateway_session')
+    def test_fetch_uses_pooled_session(self, mock_session):
+        from ..api_clients import get_hcgateway_data
+        mock_session.return_value.post.return_value.status_code = 200
+        mock_session.return_value.post.return_value.json.return_value = {'data': []}
+        self.assertEqual(get_hcgateway_data('hc_user', 'steps'), {'data': []})
+        mock_session.return_value.post.assert_called_once()
+
+class ConcurrentSyncTest(TestCase):
+    @patch('fitfolio.api_clients.fetch_new_records')
+    def test_data_types_are_fetched_in_parallel(self, mock_fetch):
+        import threading
+        from ..api_clients import sync_user_health_data
+        from ..models import User
+        user = User.objects.create_user(username='testuser', password='12345')
+
+        # Every fetch waits for the other two; a sequential sync would time out here
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(hc_user_id, data_type, since):
+            barrier.wait()
+            return [], since
+
+        mock_fetch.side_effect = fetch
+        summary = sync_user_health_data(user.id, 'hc_user')
+        self.assertEqual(set(summary['timings']), {'steps', 'weight', 'sleep'})
+        self.assertIn('fetch_seconds', summary['timings']['steps'])
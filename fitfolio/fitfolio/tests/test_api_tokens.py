@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from datetime import timedelta
+from io import StringIO
+from ..models import User, APIToken
+from ..authentication import APITokenAuthentication, create_token, hash_token, local_tokens
+
+class APITokenTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+
+    def bearer(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {key}')
+
+    def test_token_is_stored_hashed_and_authenticates(self):
+        token, key = create_token(self.user, 'phone')
+        self.assertEqual(token.key_hash, hash_token(key))
+        self.assertFalse(APIToken.objects.filter(key_hash=key).exists())
+
+        self.bearer(key)
+        self.assertEqual(self.client.get('/api/activity/').status_code, 200)
+        self.assertIsNotNone(APIToken.objects.get(pk=token.pk).last_used_at)
+
+        request = APIRequestFactory().get('/api/activity/', HTTP_AUTHORIZATION=f'Bearer {key}')
+        with self.assertNumQueries(0):
+            user, auth = APITokenAuthentication().authenticate(request)
+        self.assertEqual((user, auth.token_id), (self.user, token.pk))
+
+        # The shared cache holds no User row (nor its password hash); another
+        # process finding the token there loads the user by primary key
+        entry = cache.get(f'fitfolio:apitoken:{token.key_hash}')
+        self.assertEqual((entry['user_id'], entry['is_active']), (self.user.pk, True))
+        self.assertNotIn('user', entry)
+        local_tokens.clear()
+        with self.assertNumQueries(1):
+            user, _ = APITokenAuthentication().authenticate(request)
+        self.assertEqual(user, self.user)
+
+    def test_scopes_expiry_and_revocation(self):
+        _, read_key = create_token(self.user, 'dashboard', scopes=['read'])
+        self.bearer(read_key)
+        self.assertEqual(self.client.get('/api/weight/').status_code, 200)
+        response = self.client.post('/api/weight/', {'date': '2025-01-01', 'weight': 80.0}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        expired, expired_key = create_token(self.user, 'old', expires_at=timezone.now() - timedelta(days=1))
+        self.bearer(expired_key)
+        self.assertEqual(self.client.get('/api/weight/').json()['detail'], 'Token has expired.')
+
+        token, key = create_token(self.user, 'uploader')
+        self.bearer(key)
+        self.assertEqual(self.client.get('/api/weight/').status_code, 200)
+        token.delete()
+        self.assertEqual(self.client.get('/api/weight/').status_code, 403)
+
+        self.user.is_active = False
+        self.user.save()
+        self.bearer(read_key)
+        self.assertEqual(self.client.get('/api/weight/').status_code, 403)
+
+    def test_unknown_tokens_are_cached_as_invalid(self):
+        request = APIRequestFactory().get('/api/activity/', HTTP_AUTHORIZATION='Bearer ff_guess')
+        for queries in (1, 0):
+            with self.assertNumQueries(queries):
+                with self.assertRaises(AuthenticationFailed):
+                    APITokenAuthentication().authenticate(request)
+
+    def test_create_api_token_command(self):
+        out = StringIO()
+        call_command('create_api_token', 'testuser', '--scopes', 'read', '--days', '30', stdout=out)
+        key = out.getvalue().strip().splitlines()[-1]
+        token = APIToken.objects.get(key_hash=hash_token(key))
+        self.assertEqual(token.scopes, 'read')
+        self.assertEqual(token.prefix, key[:9])
+
+        self.bearer(key)
+        self.assertEqual(self.client.get('/api/sleep/').status_code, 200)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from datetime import date, timedelta
+from ..models import User, ActivityData
+from ..bulk import bulk_upsert
+from ..api_clients import ACTIVITY_FIELDS, parse_steps_records
+
+class BulkUpsertTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    def test_created_and_updated_counts(self):
+        ActivityData.objects.create(user=self.user, date=date(2025, 1, 1), steps=10)
+        rows = {
+            date(2025, 1, 1): {'steps': 100, 'distance': 0.08, 'calories_burned': 4},
+            date(2025, 1, 2): {'steps': 200, 'distance': 0.16, 'calories_burned': 8},
+        }
+        result = bulk_upsert(ActivityData, self.user, rows, ACTIVITY_FIELDS)
+        self.assertEqual(result.created, [date(2025, 1, 2)])
+        self.assertEqual(result.updated, [date(2025, 1, 1)])
+        self.assertEqual(ActivityData.objects.get(user=self.user, date=date(2025, 1, 1)).steps, 100)
+
+    def test_query_count_is_independent_of_record_count(self):
+        rows = {
+            date(2025, 1, 1) + timedelta(days=i): {'steps': i, 'distance': 0.0, 'calories_burned': 0}
+            for i in range(100)
+        }
+        # SAVEPOINT + SELECT + INSERT + RELEASE
+        with self.assertNumQueries(4):
+            result = bulk_upsert(ActivityData, self.user, rows, ACTIVITY_FIELDS)
+        self.assertEqual(result.created_count, 100)
+
+    def test_parse_collapses_records_by_date(self):
+        rows = parse_steps_records([
+            {'start': '2025-01-01T08:00:00Z', 'count': 1000},
+            {'start': '2025-01-01T09:00:00Z', 'count': 2000},
+            {'start': 'not-a-date', 'count': 5},
+        ])
+        self.assertEqual(list(rows), [date(2025, 1, 1)])
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+import json
+from ..models import User, ActivityData, WeightData, MetricRollup
+
+class BulkWriteApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_year_of_history_in_one_request(self):
+        start = date(2024, 1, 1)
+        records = [{'date': (start + timedelta(days=i)).isoformat(), 'steps': 1000 + i} for i in range(365)]
+        response = self.client.post('/api/activity/bulk/', records, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 365)
+        self.assertEqual(ActivityData.objects.filter(user=self.user).count(), 365)
+        # Rollups are refreshed through the same data-changed signal as single writes
+        self.assertTrue(MetricRollup.objects.filter(user=self.user, metric='activity').exists())
+
+    def test_per_item_status(self):
+        WeightData.objects.create(user=self.user, date=date(2025, 1, 1), weight=80.0)
+        response = self.client.post('/api/weight/bulk/', [
+            {'date': '2025-01-01', 'weight': 79.5},
+            {'date': '2025-01-02', 'weight': 79.0},
+            {'date': 'not-a-date', 'weight': 79.0},
+            {'date': '2025-01-02', 'weight': 78.5},
+        ], format='json')
+        data = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['status'] for item in data['results']],
+                         ['updated', 'superseded', 'invalid', 'created'])
+        self.assertIn('date', data['results'][2]['errors'])
+        self.assertEqual((data['created'], data['updated'], data['invalid']), (1, 1, 1))
+        self.assertEqual(WeightData.objects.get(user=self.user, date=date(2025, 1, 2)).weight, 78.5)
+
+    def test_ndjson_body(self):
+        body = '\n'.join(json.dumps({'date': f'2025-01-0{i}', 'steps': i}) for i in range(1, 4))
+        response = self.client.post('/api/activity/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.json()['created'], 3)
+
+        response = self.client.post('/api/activity/bulk/', '{"date": \n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(METRIC_BULK_MAX_RECORDS=2)
+    def test_rejects_oversized_and_non_list_bodies(self):
+        records = [{'date': f'2025-01-0{i}', 'steps': i} for i in range(1, 4)]
+        self.assertEqual(self.client.post('/api/activity/bulk/', records, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/activity/bulk/', records[0], format='json').status_code, 400)
+        self.assertFalse(ActivityData.objects.exists())
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date
+from ..models import User, WeightData
+from ..bulk import bulk_upsert
+from ..signals import notify_metric_data_changed
+from ..caching import cache_stats
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/weight/', {'date': date.today().isoformat(), 'weight': 80.0}, format='json')
+
+    def test_recent_is_served_from_cache_until_data_changes(self):
+        first = self.client.get('/api/weight/recent/').json()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/weight/recent/').json(), first)
+
+        # A sync-style bulk write invalidates the user's weight entries
+        result = bulk_upsert(WeightData, self.user, {date.today(): {'weight': 79.0}}, ['weight'])
+        notify_metric_data_changed(WeightData, self.user.id, 'weight', result.updated)
+        self.assertEqual(self.client.get('/api/weight/recent/').json()[0]['weight'], 79.0)
+
+        stats = cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_sparse_fieldsets_are_cached_separately(self):
+        self.assertEqual(list(self.client.get('/api/weight/recent/?fields=date').json()[0]), ['date'])
+        self.assertIn('weight', self.client.get('/api/weight/recent/').json()[0])
+        expected = {'date': date.today().isoformat(), 'weight': 80.0}
+        self.assertEqual(self.client.get('/api/weight/recent/?fields=weight,date').json()[0], expected)
+        # The same field set in another order or with unknown names shares the entry
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/weight/recent/?fields=date,nope,weight').json()[0], expected)
+
+    def test_other_users_and_metrics_keep_their_entries(self):
+        self.client.get('/api/activity/summary/')
+        self.client.post('/api/weight/', {'date': '2025-01-01', 'weight': 81.0}, format='json')
+        with self.assertNumQueries(0):
+            self.client.get('/api/activity/summary/')
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get('/api/cache-stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn('hit_ratio', self.client.get('/api/cache-stats/').json())
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+from ..models import User, ActivityData, WeightData
+
+class DashboardDataTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = date.today()
+        ActivityData.objects.create(user=self.user, date=today - timedelta(days=1), steps=4000)
+        ActivityData.objects.create(user=self.user, date=today, steps=5000)
+        WeightData.objects.create(user=self.user, date=today, weight=80.5)
+
+    def test_columnar_payload(self):
+        data = self.client.get('/api/dashboard/').json()
+        self.assertEqual(data['activity']['steps'], [4000, 5000])
+        self.assertEqual(data['activity']['dates'][-1], date.today().isoformat())
+        self.assertEqual(data['sleep'], {'dates': [], 'total_sleep_minutes': [], 'sleep_quality_score': []})
+        self.assertEqual(data['stats']['steps_today'], 5000)
+        self.assertEqual(data['stats']['current_weight'], 80.5)
+        self.assertIsNone(data['stats']['last_sleep_formatted'])
+
+    def test_conditional_get_until_data_changes(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.client.post('/api/weight/', {'date': (date.today() - timedelta(days=1)).isoformat(), 'weight': 81.0}, format='json')
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,47 @@
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+import tempfile
+from ..database import parse_database_url
+
+class DatabaseUrlTest(SimpleTestCase):
+    def test_postgres_url(self):
+        config = parse_database_url('postgres://fit:p%40ss@db:5432/fitfolio?sslmode=require', '/app', 600)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(
+            (config['NAME'], config['USER'], config['PASSWORD'], config['HOST'], config['PORT']),
+            ('fitfolio', 'fit', 'p@ss', 'db', '5432'),
+        )
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+        self.assertEqual(config['OPTIONS']['sslmode'], 'require')
+        self.assertEqual(config['OPTIONS']['keepalives'], 1)
+
+    def test_sqlite_urls(self):
+        self.assertEqual(str(parse_database_url('sqlite:///db.sqlite3', '/app')['NAME']), '/app/db.sqlite3')
+        self.assertEqual(str(parse_database_url('sqlite:////data/db.sqlite3', '/app')['NAME']), '/data/db.sqlite3')
+        self.assertEqual(parse_database_url('sqlite://', '/app')['NAME'], ':memory:')
+        with self.assertRaises(ValueError):
+            parse_database_url('mysql://db/fitfolio', '/app')
+
+
+class SQLiteBackendTest(SimpleTestCase):
+    def test_wal_and_immediate_transactions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = parse_database_url(f'sqlite:///{directory}/db.sqlite3', '/app', sqlite_timeout=0.1)
+            handlers = [ConnectionHandler({'default': config}) for _ in range(2)]
+            first, second = (handler['default'] for handler in handlers)
+            try:
+                with first.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+
+                # The write lock is taken when the transaction starts, so a
+                # second writer waits (here: times out) at BEGIN instead of
+                # failing later, halfway through a read-then-write upsert
+                first._start_transaction_under_autocommit()
+                with self.assertRaises(OperationalError):
+                    second._start_transaction_under_autocommit()
+                first.cursor().execute('ROLLBACK')
+            finally:
+                first.close()
+                second.close()
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+import numpy as np
+from ..models import User, ActivityData
+from ..downsampling import lttb_indices, minmax_indices
+
+class DownsamplingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_peaks_survive_and_size_is_bounded(self):
+        rng = np.random.default_rng(0)
+        x = np.arange(10000)
+        y = rng.normal(8000, 500, len(x))
+        y[1234], y[8765] = 40000, 0
+        for select in (lttb_indices, minmax_indices):
+            indices = select(x, y, 100)
+            self.assertLessEqual(len(indices), 100)
+            self.assertTrue(np.all(np.diff(indices) > 0))
+            self.assertIn(1234, indices)
+        self.assertIn(8765, minmax_indices(x, y, 100))
+
+    def test_all_time_list_with_points(self):
+        start = date.today() - timedelta(days=1499)
+        ActivityData.objects.bulk_create([
+            ActivityData(user=self.user, date=start + timedelta(days=i), steps=20000 if i == 500 else 5000)
+            for i in range(1500)
+        ])
+        rows = self.client.get('/api/activity/?points=50').json()
+        self.assertLessEqual(len(rows), 50)
+        self.assertIn(20000, [row['steps'] for row in rows])
+        # ?fields= may leave out the downsampled field: the peak is still kept
+        peak = (start + timedelta(days=500)).isoformat()
+        dates = self.client.get('/api/activity/?points=50&fields=date').json()
+        self.assertEqual(dates, [{'date': row['date']} for row in rows])
+        self.assertIn({'date': peak}, dates)
+
+        since = (start + timedelta(days=1000)).isoformat()
+        minmax = self.client.get(f'/api/activity/?points=50&downsample=minmax&date__gte={since}').json()
+        self.assertLessEqual(len(minmax), 50)
+        self.assertTrue(all(row['date'] >= since for row in minmax))
+
+        dashboard = self.client.get('/api/dashboard/?points=3').json()
+        self.assertEqual(len(dashboard['activity']['dates']), 3)
+        self.assertEqual(self.client.get('/api/activity/?points=50&downsample=average').status_code, 400)
+
+        # Only a real downsample skips pagination
+        page = self.client.get('/api/activity/?points=0').json()
+        self.assertEqual(len(page['results']), 100)
+        self.assertEqual(self.client.get('/api/activity/?points=junk').status_code, 400)
+        self.assertEqual(self.client.get('/api/activity/?points=2').status_code, 400)
@@ -0,0 +1,49 @@
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date
+from io import StringIO
+import csv
+import json
+from ..models import User, ActivityData, WeightData, SleepData
+from ..export import export_rows
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        ActivityData.objects.create(user=self.user, date=date(2025, 1, 1), steps=1000)
+        ActivityData.objects.create(user=self.user, date=date(2025, 1, 3), steps=3000)
+        WeightData.objects.create(user=self.user, date=date(2025, 1, 2), weight=80.0)
+        SleepData.objects.create(user=self.user, date=date(2025, 1, 3), total_sleep_minutes=420)
+
+    def test_merges_tables_by_date_across_chunks(self):
+        rows = list(export_rows(self.user.pk, ['activity', 'weight', 'sleep'], chunk_size=1))
+        self.assertEqual([row['date'] for row in rows], ['2025-01-01', '2025-01-02', '2025-01-03'])
+        self.assertEqual(rows[0]['activity']['steps'], 1000)
+        self.assertIsNone(rows[0]['weight'])
+        self.assertEqual(rows[2]['sleep']['sleep_duration_formatted'], '7h 0m')
+        self.assertEqual(rows[2]['activity']['steps'], 3000)
+
+    def test_streams_ndjson_and_csv(self):
+        response = self.client.get('/api/export/?format=ndjson&metrics=activity,weight')
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertNotIn('sleep', lines[0])
+
+        response = self.client.get('/api/export/?format=csv&metrics=weight')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows, [['date', 'weight_weight', 'weight_created_at'],
+                                ['2025-01-02', '80.0', rows[1][2]]])
+
+    def test_rejects_unknown_metric(self):
+        self.assertEqual(self.client.get('/api/export/?metrics=heart_rate').status_code, 400)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('export_health_data', 'testuser', '--metrics', 'activity', stdout=out)
+        self.assertEqual([json.loads(line)['activity']['steps'] for line in out.getvalue().splitlines()],
+                         [1000, 3000])
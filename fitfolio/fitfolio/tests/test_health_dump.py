@@ -0,0 +1,95 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock
+import json
+import os
+import tempfile
+from ..models import User, ActivityData, WeightData, SleepData
+from ..health_dump import DumpFormatError, import_health_dump, iter_dump_records
+
+STEPS = [{'start': f'2025-01-0{day}T08:00:00Z', 'count': day * 1000} for day in range(1, 4)]
+WEIGHT = [{'start': '2025-01-01T07:00:00Z', 'weight': 80.5}]
+SLEEP = [{'start': '2025-01-01T23:00:00Z', 'end': '2025-01-02T07:00:00Z'}]
+
+class DumpParsingTest(TestCase):
+    def test_layouts_yield_the_same_records(self):
+        keyed = json.dumps({'exportedAt': '2025-01-05', 'steps': STEPS, 'weight': WEIGHT, 'sleep': SLEEP})
+        array = json.dumps(STEPS + WEIGHT + SLEEP)
+        ndjson = '\n'.join(json.dumps(record) for record in STEPS + WEIGHT + SLEEP)
+
+        records = lambda text, fmt: [r for _, r in iter_dump_records(BytesIO(text.encode()), fmt)]
+        self.assertEqual(records(keyed, 'json'), STEPS + WEIGHT + SLEEP)
+        self.assertEqual(records(array, 'json'), STEPS + WEIGHT + SLEEP)
+        self.assertEqual(records(ndjson, 'ndjson'), STEPS + WEIGHT + SLEEP)
+        self.assertEqual(
+            [t for t, _ in iter_dump_records(BytesIO(keyed.encode()), 'json')],
+            ['steps'] * 3 + ['weight', 'sleepSession'],
+        )
+
+    def test_records_spanning_read_chunks(self):
+        text = json.dumps(STEPS * 200).encode()
+        with mock.patch('fitfolio.health_dump.READ_CHUNK_SIZE', 7):
+            records = list(iter_dump_records(BytesIO(text), 'json'))
+        self.assertEqual(len(records), 600)
+
+    def test_truncated_file(self):
+        with self.assertRaises(DumpFormatError):
+            list(iter_dump_records(BytesIO(json.dumps(STEPS).encode()[:-10]), 'json'))
+
+    def test_malformed_record_fails_without_reading_on(self):
+        stream = BytesIO(('{"start": nope}\n' + '\n'.join(json.dumps(r) for r in STEPS * 1000)).encode())
+        with mock.patch('fitfolio.health_dump.READ_CHUNK_SIZE', 64):
+            with self.assertRaises(DumpFormatError):
+                list(iter_dump_records(stream, 'ndjson'))
+        self.assertLess(stream.tell(), 1024)
+
+    @override_settings(HEALTH_DUMP_MAX_RECORD_SIZE=1000)
+    def test_oversized_record_is_rejected(self):
+        stream = BytesIO(json.dumps([{'start': 'x' * 100_000}]).encode())
+        with mock.patch('fitfolio.health_dump.READ_CHUNK_SIZE', 64):
+            with self.assertRaises(DumpFormatError):
+                list(iter_dump_records(stream, 'json'))
+        self.assertLess(stream.tell(), 2048)
+
+class ImportHealthDumpTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    def test_upserts_in_batches(self):
+        ActivityData.objects.create(user=self.user, date=date(2025, 1, 1), steps=1)
+        dump = json.dumps({'steps': STEPS, 'weight': WEIGHT, 'sleepSession': SLEEP, 'other': [{'x': 1}]})
+        summary = import_health_dump(self.user, BytesIO(dump.encode()), batch_size=2)
+
+        self.assertEqual((summary['steps_created'], summary['steps_updated']), (2, 1))
+        self.assertEqual((summary['records'], summary['skipped']), (6, 1))
+        self.assertEqual(ActivityData.objects.get(user=self.user, date=date(2025, 1, 1)).steps, 1000)
+        self.assertEqual(WeightData.objects.get(user=self.user).weight, 80.5)
+        self.assertEqual(SleepData.objects.get(user=self.user).total_sleep_minutes, 480)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as dump:
+            dump.write('\n'.join(json.dumps(record) for record in STEPS))
+        self.addCleanup(os.remove, dump.name)
+
+        out = StringIO()
+        call_command('import_health_dump', 'testuser', dump.name, stdout=out)
+        self.assertIn('Imported 3 records', out.getvalue())
+        self.assertEqual(ActivityData.objects.filter(user=self.user).count(), 3)
+
+    def test_upload_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/import/', '\n'.join(json.dumps(r) for r in WEIGHT),
+                               content_type='application/x-ndjson')
+        self.assertEqual(response.json()['weight_created'], 1)
+
+        upload = SimpleUploadedFile('dump.json', json.dumps(STEPS).encode(), content_type='application/json')
+        response = client.post('/api/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.json()['steps_created'], 3)
+
+        response = client.post('/api/import/', '[{"start": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+from ..models import User, ActivityData, WeightData, SleepData
+
+METRIC_TABLES = ('fitfolio_activitydata', 'fitfolio_weightdata', 'fitfolio_sleepdata')
+
+class CoveringIndexTest(TestCase):
+    """The hot per-user time range queries must be answered from an index alone"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = date.today()
+        for i in range(60):
+            day = today - timedelta(days=i)
+            ActivityData.objects.create(user=self.user, date=day, steps=5000 + i)
+            WeightData.objects.create(user=self.user, date=day, weight=80.0)
+            SleepData.objects.create(user=self.user, date=day, total_sleep_minutes=(i % 3) * 200)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')  # Tables this small would be scanned
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' '.join(str(column) for row in cursor.fetchall() for column in row)
+
+    def hot_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [q['sql'] for q in queries if any(f'FROM "{table}"' in q['sql'] for table in METRIC_TABLES)]
+
+    def assert_index_only(self, url, *indexes):
+        statements = self.hot_queries(url)
+        self.assertTrue(statements, url)
+        template = 'Index Only Scan using {}' if connection.vendor == 'postgresql' else 'USING COVERING INDEX {}'
+        for sql in statements:
+            plan = self.plan(sql)
+            self.assertTrue(any(template.format(index) in plan for index in indexes), f'{url}: {plan}')
+
+    def test_hot_queries_use_covering_indexes(self):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            self.skipTest('Covering indexes are only created on PostgreSQL and SQLite')
+        self.assert_index_only('/api/activity/recent/', 'fitfolio_activity_user_date_cov')
+        self.assert_index_only('/api/activity/summary/?days=30', 'fitfolio_activity_user_date_cov')
+        self.assert_index_only('/api/weight/?date__gte=2025-01-01', 'fitfolio_weight_user_date_cov')
+        self.assert_index_only('/api/weight/chart/', 'fitfolio_weight_user_date_cov')
+        self.assert_index_only('/api/sleep/chart/', 'fitfolio_sleep_user_date_cov')
+        self.assert_index_only('/api/dashboard/', 'fitfolio_activity_user_date_cov',
+                               'fitfolio_weight_user_date_cov', 'fitfolio_sleep_user_date_cov')
+        # Partial index: only nights with data are counted
+        self.assert_index_only('/api/sleep/summary/?days=30', 'fitfolio_sleep_nonempty_idx')
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+from ..models import User, UserProfile, UserInsights, ActivityData, WeightData, SleepData
+from ..insights import compute_insights_chunk, load_chunk_series, compute_insights
+
+class InsightsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = date(2025, 3, 31)
+        self.users = [User.objects.create_user(username=f'user{i}', password='12345') for i in range(3)]
+        for user in self.users:
+            UserProfile.objects.create(user=user, sync_enabled=True)
+
+    def add_days(self, user, steps):
+        """steps[i] is the step count i days before today"""
+        ActivityData.objects.bulk_create([
+            ActivityData(user=user, date=self.today - timedelta(days=i), steps=value)
+            for i, value in enumerate(steps)
+        ])
+
+    def test_streaks_bests_and_averages(self):
+        user = self.users[0]
+        # Yesterday back: 3 goal days, a miss, then 5 goal days; today is still in progress
+        self.add_days(user, [2000, 12000, 11000, 10000, 500, 15000, 10000, 10000, 10000, 10000])
+        SleepData.objects.bulk_create([
+            SleepData(user=user, date=self.today - timedelta(days=i), total_sleep_minutes=minutes)
+            for i, minutes in enumerate([0, 420, 480])
+        ])
+        WeightData.objects.bulk_create([
+            WeightData(user=user, date=self.today - timedelta(days=i), weight=80.0 + i / 10)
+            for i in range(20)
+        ])
+
+        values = compute_insights(load_chunk_series([user.id])[user.id], self.today)
+        self.assertEqual((values['current_step_streak'], values['longest_step_streak']), (3, 5))
+        self.assertEqual((values['best_steps'], values['best_steps_date']), (15000, self.today - timedelta(days=5)))
+        self.assertEqual(values['steps_avg_7'], round((2000 + 12000 + 11000 + 10000 + 500 + 15000 + 10000) / 7, 2))
+        # The 0-minute night is missing data, not the shortest night
+        self.assertEqual(values['sleep_avg_7'], 450.0)
+        self.assertEqual(values['longest_sleep_minutes'], 480)
+        self.assertEqual((values['lowest_weight'], values['lowest_weight_date']), (80.0, self.today))
+        self.assertLess(values['weight_trend_per_week'], 0)
+
+        values = compute_insights(load_chunk_series([user.id])[user.id], self.today + timedelta(days=3))
+        self.assertEqual(values['current_step_streak'], 0)
+
+    def test_chunk_queries_do_not_grow_with_users(self):
+        for user in self.users:
+            self.add_days(user, [10000] * 30)
+        user_ids = [user.id for user in self.users]
+        with self.assertNumQueries(7):
+            result = compute_insights_chunk(user_ids, self.today)
+        self.assertEqual(result['users'], 3)
+        self.assertEqual(UserInsights.objects.count(), 3)
+
+        # A rerun replaces the chunk's rows with one delete and one insert
+        with self.assertNumQueries(7):
+            compute_insights_chunk(user_ids, self.today + timedelta(days=1))
+        insights = UserInsights.objects.get(user=self.users[0])
+        self.assertEqual(insights.as_of, self.today + timedelta(days=1))
+        self.assertEqual(insights.current_step_streak, 30)
+
+    def test_command_covers_sync_enabled_users(self):
+        self.add_days(self.users[1], [10000] * 5)
+        UserProfile.objects.filter(user=self.users[2]).update(sync_enabled=False)
+        out = StringIO()
+        call_command('compute_insights', workers=1, chunk_size=1, stdout=out)
+        self.assertIn('Computed insights for 2 users in 2 chunks', out.getvalue())
+        self.assertEqual(
+            set(UserInsights.objects.values_list('user__username', flat=True)), {'user0', 'user1'}
+        )
+        self.assertIsNone(UserInsights.objects.get(user=self.users[0]).best_steps)
@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from types import SimpleNamespace
+from unittest.mock import patch
+import json
+from ..models import User
+from ..api_clients import SYNC_DATA_TYPES, sync_user_health_data
+from .. import instrumentation as metrics
+
+def scrape():
+    """Rendered samples as {'name{labels}': value}"""
+    samples = {}
+    for line in metrics.render_metrics().splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+def hcgateway_response(status_code=200, body=None):
+    response = SimpleNamespace(status_code=status_code, text='error')
+    def decode():
+        return json.loads(body if body is not None else '{"data": []}')
+    response.json = decode
+    return response
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.fetch_seconds.observe(0.02, data_type='steps')
+        metrics.fetch_seconds.observe(3, data_type='steps')
+        metrics.fetch_seconds.observe(120, data_type='steps')
+        samples = scrape()
+        self.assertEqual(samples['fitfolio_sync_fetch_seconds_bucket{data_type="steps",le="0.01"}'], 0)
+        self.assertEqual(samples['fitfolio_sync_fetch_seconds_bucket{data_type="steps",le="0.025"}'], 1)
+        self.assertEqual(samples['fitfolio_sync_fetch_seconds_bucket{data_type="steps",le="5"}'], 2)
+        self.assertEqual(samples['fitfolio_sync_fetch_seconds_bucket{data_type="steps",le="+Inf"}'], 3)
+        self.assertEqual(samples['fitfolio_sync_fetch_seconds_count{data_type="steps"}'], 3)
+        self.assertAlmostEqual(samples['fitfolio_sync_fetch_seconds_sum{data_type="steps"}'], 123.02)
+        self.assertEqual(samples['fitfolio_sync_fetch_seconds_count{data_type="weight"}'], 0)
+
+        # Undeclared labels are logged and dropped, never raised into the sync
+        with self.assertLogs('fitfolio.instrumentation', 'ERROR'):
+            metrics.fetch_seconds.observe(1, data_type='heartRate')
+            metrics.errors.inc()
+            with metrics.upsert_seconds.time(kind='steps'):
+                pass
+        self.assertEqual(scrape(), samples)
+
+    def test_label_values_cover_the_synced_data_types(self):
+        self.assertEqual({data_type for _, data_type, _, _, _ in SYNC_DATA_TYPES}, set(metrics.DATA_TYPES))
+
+    def test_queue_lag_is_measured_from_publish(self):
+        headers = {}
+        metrics.stamp_sent_at(headers=headers)
+        headers[metrics.SENT_AT_HEADER] -= 10
+        task = SimpleNamespace(name='fitfolio.tasks.sync_health_data_batch', request=SimpleNamespace(eta=None, **headers))
+        metrics.record_queue_lag(task=task)
+        # Tasks from other apps are ignored
+        metrics.record_queue_lag(task=SimpleNamespace(name='celery.chord_unlock', request=task.request))
+
+        samples = scrape()
+        self.assertEqual(samples['fitfolio_task_queue_lag_seconds_count{task="sync_health_data_batch"}'], 1)
+        self.assertEqual(samples['fitfolio_task_queue_lag_seconds_bucket{task="sync_health_data_batch",le="5"}'], 0)
+        self.assertEqual(samples['fitfolio_task_queue_lag_seconds_bucket{task="sync_health_data_batch",le="15"}'], 1)
+
+    def test_endpoint_is_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='testuser', password='12345'))
+        self.assertEqual(client.get('/metrics').status_code, 403)
+
+        client.force_authenticate(User.objects.create_superuser(username='admin', password='12345'))
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('# TYPE fitfolio_sync_errors_total counter', response.content.decode())
+
+class SyncInstrumentationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    @patch('fitfolio.api_clients.get_hcgateway_session')
+    def test_sync_records_every_stage(self, mock_session):
+        bodies = {
+            'steps': '{"data": [{"start": "2025-01-01T08:00:00Z", "end": "2025-01-01T09:00:00Z", "count": 10},'
+                     ' {"start": "bad"}]}',
+            'weight': 'not json',
+        }
+        def post(url, **kwargs):
+            data_type = url.rsplit('/', 1)[-1]
+            if data_type == 'sleepSession':
+                return hcgateway_response(503)
+            return hcgateway_response(body=bodies[data_type])
+        mock_session.return_value.post.side_effect = post
+
+        summary = sync_user_health_data(self.user.id, 'hc_user')
+        self.assertEqual(summary['steps_records'], 1)
+        sync_user_health_data(self.user.id + 100, 'hc_user')
+
+        samples = scrape()
+        for data_type in metrics.DATA_TYPES:
+            self.assertEqual(samples[f'fitfolio_sync_fetch_seconds_count{{data_type="{data_type}"}}'], 1)
+        self.assertEqual(samples['fitfolio_sync_decode_seconds_count{data_type="steps"}'], 1)
+        self.assertEqual(samples['fitfolio_sync_records_parsed_total{data_type="steps"}'], 2)
+        self.assertEqual(samples['fitfolio_sync_upsert_seconds_count{data_type="steps"}'], 1)
+        self.assertEqual(samples['fitfolio_sync_upsert_seconds_count{data_type="weight"}'], 0)
+        self.assertEqual(samples['fitfolio_sync_records_written_total{data_type="steps",result="created"}'], 1)
+        self.assertEqual(samples['fitfolio_sync_user_seconds_count'], 1)
+        for kind in ('record', 'decode', 'http_status', 'missing_user'):
+            self.assertEqual(samples[f'fitfolio_sync_errors_total{{kind="{kind}"}}'], 1, kind)
@@ -0,0 +1,75 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+from ..models import User, ActivityData, SleepData
+
+class MetricListTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        start = date(2025, 1, 1)
+        ActivityData.objects.bulk_create([
+            ActivityData(user=self.user, date=start + timedelta(days=i), steps=i) for i in range(25)
+        ])
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen = []
+        url = '/api/activity/?page_size=10'
+        while url:
+            page = self.client.get(url).json()
+            seen.extend(row['steps'] for row in page['results'])
+            url = page['next']
+        self.assertEqual(seen, list(range(24, -1, -1)))
+
+    def test_date_range_and_sparse_fields(self):
+        data = self.client.get('/api/activity/?date__gte=2025-01-10&date__lte=2025-01-12&fields=date,steps').json()
+        self.assertEqual(data['results'], [
+            {'date': '2025-01-12', 'steps': 11},
+            {'date': '2025-01-11', 'steps': 10},
+            {'date': '2025-01-10', 'steps': 9},
+        ])
+        self.assertEqual(self.client.get('/api/activity/?date__gte=yesterday').status_code, 400)
+
+    def test_unknown_sparse_fields_keep_one_object_per_row(self):
+        page = self.client.get('/api/activity/?page_size=10&fields=bogus').json()
+        self.assertEqual(page['results'], [{}] * 10)
+        self.assertIsNotNone(page['next'])
+        ActivityData.objects.bulk_create([
+            ActivityData(user=self.user, date=date.today() - timedelta(days=i), steps=i) for i in range(3)
+        ])
+        self.assertEqual(self.client.get('/api/activity/recent/?fields=bogus').json(), [{}] * 3)
+
+    def test_sparse_fields_only_trim_output(self):
+        response = self.client.post('/api/activity/?fields=id,date', {'date': '2025-03-01', 'steps': 1234}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(set(response.json()), {'id', 'date'})
+        row = ActivityData.objects.get(user=self.user, date=date(2025, 3, 1))
+        self.assertEqual(row.steps, 1234)
+
+        response = self.client.patch(f'/api/activity/{row.pk}/?fields=id', {'steps': 5}, format='json')
+        self.assertEqual(response.json(), {'id': row.pk})
+        row.refresh_from_db()
+        self.assertEqual(row.steps, 5)
+
+        response = self.client.post('/api/activity/bulk/?fields=date', [{'date': '2025-03-02', 'steps': 777}], format='json')
+        self.assertEqual(response.json()['results'][0]['status'], 'created')
+        self.assertEqual(ActivityData.objects.get(user=self.user, date=date(2025, 3, 2)).steps, 777)
+
+    def test_sparse_fields_skip_computed_sleep_duration(self):
+        SleepData.objects.create(user=self.user, date=date(2025, 1, 1), total_sleep_minutes=480)
+        row = self.client.get('/api/sleep/?fields=date,total_sleep_minutes').json()['results'][0]
+        self.assertEqual(row, {'date': '2025-01-01', 'total_sleep_minutes': 480})
+
+class FastReadSerializerTest(TestCase):
+    def test_matches_model_serializer_output(self):
+        from django.utils import timezone
+        from ..serializers import SleepDataSerializer, FastReadSerializer
+        user = User.objects.create_user(username='testuser', password='12345')
+        SleepData.objects.create(user=user, date=date(2025, 1, 1), total_sleep_minutes=485,
+                                 sleep_start=timezone.now(), deep_sleep_minutes=None)
+        SleepData.objects.create(user=user, date=date(2025, 1, 2))
+        queryset = SleepData.objects.filter(user=user)
+
+        expected = SleepDataSerializer(queryset, many=True).data
+        self.assertEqual(FastReadSerializer(SleepDataSerializer).serialize(queryset), expected)
@@ -0,0 +1,48 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date
+from ..models import User, ActivityData, MetricRollup
+from ..bulk import bulk_upsert
+from ..api_clients import ACTIVITY_FIELDS
+from ..signals import notify_metric_data_changed
+
+class RollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def write_steps(self, steps_by_date):
+        rows = {day: {'steps': steps, 'distance': 0.0, 'calories_burned': 0} for day, steps in steps_by_date.items()}
+        result = bulk_upsert(ActivityData, self.user, rows, ACTIVITY_FIELDS)
+        notify_metric_data_changed(ActivityData, self.user.id, 'activity', result.created + result.updated)
+
+    def test_sync_writes_update_touched_periods(self):
+        # 2025-01-06 is a Monday
+        self.write_steps({date(2025, 1, 6): 1000, date(2025, 1, 7): 3000, date(2025, 1, 13): 500})
+        week = MetricRollup.objects.get(user=self.user, metric='activity', granularity='week',
+                                        period_start=date(2025, 1, 6))
+        self.assertEqual((week.count, week.total, week.average, week.minimum, week.maximum),
+                         (2, 4000, 2000, 1000, 3000))
+        month = MetricRollup.objects.get(user=self.user, metric='activity', granularity='month',
+                                         period_start=date(2025, 1, 1))
+        self.assertEqual(month.total, 4500)
+
+        self.write_steps({date(2025, 1, 7): 5000})
+        week.refresh_from_db()
+        self.assertEqual(week.total, 6000)
+
+    def test_rollup_endpoint_reads_aggregates(self):
+        self.write_steps({date(2025, 1, 6): 1000, date(2025, 2, 3): 2000})
+        response = self.client.get('/api/activity/rollup/?granularity=month&from=2025-02-01')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{
+            'period_start': '2025-02-01', 'count': 1, 'sum': 2000.0, 'avg': 2000.0, 'min': 2000.0, 'max': 2000.0,
+        }])
+        self.assertEqual(self.client.get('/api/activity/rollup/?granularity=day').status_code, 400)
+
+    def test_api_delete_removes_empty_period(self):
+        response = self.client.post('/api/activity/', {'date': '2025-01-06', 'steps': 100}, format='json')
+        self.assertEqual(MetricRollup.objects.filter(user=self.user).count(), 2)
+        self.client.delete(f"/api/activity/{response.json()['id']}/")
+        self.assertFalse(MetricRollup.objects.filter(user=self.user).exists())
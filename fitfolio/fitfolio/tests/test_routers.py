@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+from unittest.mock import patch
+from ..models import User, ActivityData, UserProfile
+from ..routers import PrimaryReplicaRouter, use_replica
+from ..insights import compute_insights_chunk
+
+@override_settings(DATABASE_REPLICA_READS=True)
+class ReplicaRoutingTest(TransactionTestCase):
+    # 'replica' is a test mirror of 'default': same data through a separate
+    # connection, which can't see the uncommitted rows of a TestCase
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.router = PrimaryReplicaRouter()
+
+    def queries(self):
+        return CaptureQueriesContext(connections['default']), CaptureQueriesContext(connections['replica'])
+
+    def test_router_is_opt_in_and_sticks_to_primary_after_a_write(self):
+        self.assertEqual(self.router.db_for_read(ActivityData), 'default')
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(ActivityData), 'replica')
+            self.assertEqual(self.router.db_for_write(ActivityData), 'default')
+            self.assertEqual(self.router.db_for_read(ActivityData), 'default')
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(ActivityData), 'replica')
+        self.assertFalse(self.router.allow_migrate('replica', 'fitfolio'))
+
+        with override_settings(DATABASE_REPLICA_READS=False), use_replica():
+            self.assertEqual(self.router.db_for_read(ActivityData), 'default')
+
+    def test_api_reads_use_the_replica_until_the_user_writes(self):
+        primary, replica = self.queries()
+        with primary, replica:
+            self.client.get('/api/activity/')
+            self.client.get('/api/analytics/?days=30')
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+
+        response = self.client.post('/api/activity/', {'date': '2025-01-01', 'steps': 100}, format='json')
+        self.assertEqual(response.status_code, 201)
+        primary, replica = self.queries()
+        with primary, replica:
+            self.client.get('/api/activity/')
+        # Just wrote: reads stay on the primary for DATABASE_REPLICA_LAG seconds
+        self.assertEqual(len(replica), 0)
+        self.assertGreater(len(primary), 0)
+
+    def test_view_errors_leave_the_replica_block(self):
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(self.user)
+        with patch('fitfolio.views.ActivityDataViewSet.get_queryset', side_effect=RuntimeError):
+            self.assertEqual(client.get('/api/activity/').status_code, 500)
+        self.assertEqual(self.router.db_for_read(ActivityData), 'default')
+
+    def test_insights_batch_reads_from_the_replica(self):
+        UserProfile.objects.create(user=self.user, sync_enabled=True)
+        ActivityData.objects.create(user=self.user, date=date.today() - timedelta(days=1), steps=12000)
+        primary, replica = self.queries()
+        with primary, replica:
+            compute_insights_chunk([self.user.pk])
+        self.assertEqual(len(replica), 3)
+        self.assertFalse(any('fitfolio_activitydata' in q['sql'] for q in primary.captured_queries))
+        self.assertEqual(self.user.insights.best_steps, 12000)
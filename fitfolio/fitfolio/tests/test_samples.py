@@ -0,0 +1,51 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date
+from ..models import User, ActivityData, SleepData, HealthSample
+from ..samples import store_and_aggregate
+
+class SampleAggregationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+
+    def test_steps_on_the_same_day_are_summed(self):
+        store_and_aggregate(self.user, 'steps', [
+            {'start': '2025-01-01T08:00:00Z', 'end': '2025-01-01T09:00:00Z', 'count': 1000},
+            {'start': '2025-01-01T09:00:00Z', 'end': '2025-01-01T10:00:00Z', 'count': 2000},
+        ])
+        # A later sync re-sends one hour with a new count and adds another day
+        result = store_and_aggregate(self.user, 'steps', [
+            {'start': '2025-01-01T09:00:00Z', 'end': '2025-01-01T10:00:00Z', 'count': 2500},
+            {'start': '2025-01-02T08:00:00Z', 'end': '2025-01-02T09:00:00Z', 'count': 700},
+        ])
+
+        self.assertEqual(result.updated, [date(2025, 1, 1)])
+        self.assertEqual(result.created, [date(2025, 1, 2)])
+        self.assertEqual(HealthSample.objects.filter(user=self.user).count(), 3)
+        day = ActivityData.objects.get(user=self.user, date=date(2025, 1, 1))
+        self.assertEqual(day.steps, 3500)
+        self.assertEqual(day.calories_burned, 140)
+
+    def test_sleep_sessions_starting_the_same_day_are_combined(self):
+        store_and_aggregate(self.user, 'sleepSession', [
+            {'start': '2025-01-01T13:00:00Z', 'end': '2025-01-01T13:30:00Z'},
+            {'start': '2025-01-01T23:00:00Z', 'end': '2025-01-02T07:00:00Z'},
+        ])
+        night = SleepData.objects.get(user=self.user, date=date(2025, 1, 1))
+        self.assertEqual(night.total_sleep_minutes, 510)
+        self.assertEqual(night.sleep_start.hour, 13)
+        self.assertEqual(night.sleep_end.day, 2)
+
+    def test_intraday_endpoint(self):
+        store_and_aggregate(self.user, 'steps', [
+            {'start': '2025-01-01T09:00:00Z', 'end': '2025-01-01T10:00:00Z', 'count': 2000},
+            {'start': '2025-01-01T08:00:00Z', 'end': '2025-01-01T09:00:00Z', 'count': 1000},
+            {'start': '2025-01-02T08:00:00Z', 'end': '2025-01-02T09:00:00Z', 'count': 700},
+        ])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        data = client.get('/api/activity/intraday/?date=2025-01-01').json()
+        self.assertEqual(data['start'], ['2025-01-01T08:00:00Z', '2025-01-01T09:00:00Z'])
+        self.assertEqual(data['value'], [1000.0, 2000.0])
+        self.assertEqual(client.get('/api/weight/intraday/').status_code, 404)
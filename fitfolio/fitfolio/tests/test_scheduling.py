@@ -0,0 +1,57 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from datetime import timedelta
+from ..models import User, UserProfile
+from ..scheduling import next_interval, claim_due_profiles, record_sync_results
+
+@override_settings(HEALTH_SYNC_MIN_INTERVAL=900, HEALTH_SYNC_MAX_INTERVAL=86400, HEALTH_SYNC_JITTER=0)
+class AdaptiveSchedulingTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.profiles = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'user{i}', password='12345')
+            self.profiles.append(UserProfile.objects.create(user=user, hc_gateway_user_id=f'hc{i}', sync_enabled=True))
+
+    def test_interval_adapts_within_bounds(self):
+        self.assertEqual(next_interval(7200, 5), 3600)
+        self.assertEqual(next_interval(1000, 5), 900)
+        self.assertEqual(next_interval(7200, 0), 14400)
+        self.assertEqual(next_interval(80000, 0), 86400)
+
+    def test_unscheduled_users_are_staggered_not_dispatched_at_once(self):
+        claim_due_profiles(self.now)
+        slots = set(UserProfile.objects.values_list('next_sync_at', flat=True))
+        self.assertEqual(len(slots), 3)
+        self.assertTrue(all(self.now <= slot < self.now + timedelta(seconds=7200) for slot in slots))
+
+    def test_due_users_are_claimed_once(self):
+        UserProfile.objects.update(next_sync_at=self.now - timedelta(seconds=1))
+        self.assertEqual(len(claim_due_profiles(self.now)), 3)
+        self.assertEqual(claim_due_profiles(self.now), [])
+
+    def test_results_back_off_idle_users(self):
+        busy, idle = self.profiles[0], self.profiles[1]
+        record_sync_results({busy.user_id: 12, idle.user_id: 0}, now=self.now)
+        busy.refresh_from_db()
+        idle.refresh_from_db()
+        self.assertEqual(busy.sync_interval, 3600)
+        self.assertEqual(idle.sync_interval, 14400)
+        self.assertEqual(idle.idle_syncs, 1)
+        self.assertEqual(idle.next_sync_at, self.now + timedelta(seconds=14400))
+
+    def test_failed_syncs_keep_their_interval(self):
+        from unittest.mock import patch
+        from ..tasks import sync_health_data_batch
+        # HCGateway is down: every fetch fails, so nothing new comes back
+        with patch('fitfolio.api_clients.get_hcgateway_data', return_value=None):
+            result = sync_health_data_batch([(p.user_id, p.hc_gateway_user_id) for p in self.profiles[:2]])
+        self.assertEqual(len(result['succeeded']), 2)
+
+        record_sync_results({}, failed_user_ids={self.profiles[2].user_id}, now=self.now)
+        for profile in self.profiles:
+            profile.refresh_from_db()
+            self.assertEqual(profile.sync_interval, 7200)
+            self.assertEqual(profile.idle_syncs, 0)
+            self.assertIsNone(profile.last_sync)
+        self.assertEqual(self.profiles[2].next_sync_at, self.now + timedelta(seconds=7200))
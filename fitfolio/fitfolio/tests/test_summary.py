@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+from ..models import User, ActivityData, SleepData
+
+class SummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        today = date.today()
+        # ?days=7 compares days 0-6 back with days 7-13 back; day 14 is in neither
+        for offset, steps in [(1, 1000), (2, 3000), (7, 1000), (8, 500), (9, 1500), (14, 9999)]:
+            ActivityData.objects.create(user=self.user, date=today - timedelta(days=offset), steps=steps)
+
+    def test_activity_summary_in_one_query_with_trend(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/activity/summary/?days=7')
+        data = response.json()
+        self.assertEqual((data['count'], data['sum'], data['avg'], data['min'], data['max']),
+                         (2, 4000, 2000.0, 1000, 3000))
+        self.assertAlmostEqual(data['stddev'], 1000.0)
+        self.assertEqual(data['from'], (date.today() - timedelta(days=6)).isoformat())
+        self.assertEqual((data['previous']['count'], data['previous']['sum']), (3, 3000))
+        self.assertEqual(data['trend'], {'count': -1, 'sum': 1000, 'avg': 1000.0})
+
+    def test_empty_window_and_invalid_days(self):
+        data = self.client.get('/api/weight/summary/').json()
+        self.assertEqual(data['count'], 0)
+        self.assertIsNone(data['avg'])
+        self.assertIsNone(data['stddev'])
+        self.assertEqual(self.client.get('/api/weight/summary/?days=12').status_code, 400)
+
+    def test_sleep_summary_keeps_legacy_fields(self):
+        SleepData.objects.create(user=self.user, date=date.today(), total_sleep_minutes=450)
+        SleepData.objects.create(user=self.user, date=date.today() - timedelta(days=1), total_sleep_minutes=0)
+        data = self.client.get('/api/sleep/summary/').json()
+        self.assertEqual(data['avg_sleep_minutes'], 450)
+        self.assertEqual(data['avg_sleep_formatted'], '7h 30m')
+        self.assertEqual(data['total_nights'], 1)
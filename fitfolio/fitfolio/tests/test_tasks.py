@@ -0,0 +1,41 @@
+from django.test import TestCase, override_settings
+from unittest.mock import patch
+from ..celery import app
+from ..models import User, UserProfile
+from ..tasks import get_sync_batches, sync_all_users_health_data, summarize_sync_run
+
+def fake_summary(user_id, hc_user_id):
+    return {'total_records': 2, 'total_updated': 1}
+
+@override_settings(HEALTH_SYNC_BATCH_SIZE=2)
+class SyncFanOutTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            user = User.objects.create_user(username=f'user{i}', password='12345')
+            UserProfile.objects.create(user=user, hc_gateway_user_id=f'hc{i}', sync_enabled=i != 4)
+        app.conf.task_always_eager = True
+
+    def tearDown(self):
+        app.conf.task_always_eager = False
+
+    def test_batches_only_include_enabled_users(self):
+        batches = get_sync_batches()
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+
+    @patch('fitfolio.tasks.sync_user_health_data', side_effect=fake_summary)
+    def test_run_fans_out_batches_and_aggregates(self, mock_sync):
+        result = sync_all_users_health_data()
+        self.assertEqual(result['users_queued'], 4)
+        self.assertEqual(result['batches'], 2)
+        self.assertEqual(mock_sync.call_count, 4)
+        self.assertEqual(UserProfile.objects.filter(last_sync__isnull=False).count(), 4)
+
+    def test_summary_aggregates_batch_results(self):
+        summary = summarize_sync_run([
+            {'users': 2, 'succeeded': [1, 2], 'failed': [], 'total_records': 4, 'total_updated': 1, 'seconds': 1.0},
+            {'users': 2, 'succeeded': [3], 'failed': [4], 'total_records': 2, 'total_updated': 0, 'seconds': 2.5},
+        ])
+        self.assertEqual(summary['users_synced'], 3)
+        self.assertEqual(summary['failed_user_ids'], [4])
+        self.assertEqual(summary['total_records'], 6)
+        self.assertEqual(summary['busiest_batch_seconds'], 2.5)
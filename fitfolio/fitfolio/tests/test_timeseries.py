@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from datetime import date, timedelta
+import struct
+from ..models import User, ActivityData, WeightData
+from ..bulk import bulk_upsert
+from ..signals import notify_metric_data_changed
+from ..timeseries import get_series
+from ..downsampling import lttb_indices
+
+class ChartSeriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        ActivityData.objects.bulk_create([
+            ActivityData(user=self.user, date=date(2025, 1, 1) + timedelta(days=i), steps=i * 100)
+            for i in range(10)
+        ])
+
+    def test_writes_patch_the_cached_series(self):
+        get_series(self.user.pk, 'activity')
+        self.client.post('/api/activity/', {'date': '2024-12-31', 'steps': 5}, format='json')
+        result = bulk_upsert(ActivityData, self.user, {date(2025, 1, 5): {'steps': 9999}}, ['steps'])
+        notify_metric_data_changed(ActivityData, self.user.pk, 'activity', result.updated)
+
+        with self.assertNumQueries(0):
+            series = get_series(self.user.pk, 'activity')
+        self.assertEqual(len(series), 11)
+        self.assertEqual(series.values[0], 5)
+        self.assertEqual(series.values[5], 9999)
+
+        self.client.delete(f'/api/activity/{ActivityData.objects.get(date=date(2024, 12, 31)).id}/')
+        self.assertEqual(len(get_series(self.user.pk, 'activity')), 10)
+
+    def test_json_and_binary_chart(self):
+        data = self.client.get('/api/activity/chart/?from=2025-01-03&to=2025-01-05').json()
+        self.assertEqual(data, {'field': 'steps', 'dates': ['2025-01-03', '2025-01-04', '2025-01-05'],
+                                'values': [200, 300, 400]})
+
+        WeightData.objects.create(user=self.user, date=date(2025, 1, 1), weight=80.3)
+        response = self.client.get('/api/weight/chart/?format=bin')
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['X-Series-Value-Type'], 'float64')
+        _, count, day, weight = struct.unpack('<qIid', response.content)
+        self.assertEqual((count, day, weight), (1, (date(2025, 1, 1) - date(1970, 1, 1)).days, 80.3))
+
+    def test_downsampling(self):
+        days = list(range(100))
+        values = [0] * 100
+        values[42] = 50
+        indices = lttb_indices(days, values, 10)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual((indices[0], indices[-1]), (0, 99))
+        self.assertIn(42, indices)
+
+        data = self.client.get('/api/activity/chart/?points=4').json()
+        self.assertEqual(len(data['values']), 4)
+        self.assertEqual(self.client.get('/api/activity/chart/?points=2').status_code, 400)
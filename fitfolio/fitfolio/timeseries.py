@@ -0,0 +1,176 @@
+"""
+Compact per-user chart series kept in the cache
+
+Each (user, metric) series is one packed binary blob: a header with the
+data version it reflects and the point count, then the dates as int32 days
+since 1970-01-01 and the values as int32 or float64, in date order. Writes
+patch the cached blob in place for the changed dates only; a blob whose
+version doesn't match the current data version is rebuilt on the next read.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import FloatField
+from django.dispatch import receiver
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+import numpy as np
+import struct
+import sys
+from .caching import KEY_PREFIX, data_version
+from .downsampling import DEFAULT_METHOD, downsample_indices
+from .rollups import ROLLUP_METRICS
+from .signals import metric_data_changed
+
+EPOCH = date(1970, 1, 1)
+HEADER = struct.Struct('<qI')  # data version, number of points
+
+
+def _series_key(user_id, metric):
+    return f'{KEY_PREFIX}:series:{user_id}:{metric}'
+
+
+def value_typecode(metric):
+    model, field = ROLLUP_METRICS[metric]
+    return 'd' if isinstance(model._meta.get_field(field), FloatField) else 'i'
+
+
+VALUE_TYPES = {'i': 'int32', 'd': 'float64'}
+
+
+def epoch_day(day):
+    return (day - EPOCH).days
+
+
+def from_epoch_day(days):
+    return EPOCH + timedelta(days=days)
+
+
+class Series:
+    """Dates (epoch days) and values of one metric, both packed arrays"""
+
+    def __init__(self, metric, version, days=None, values=None):
+        self.metric = metric
+        self.version = version
+        self.days = days if days is not None else array('i')
+        self.values = values if values is not None else array(value_typecode(metric))
+
+    def __len__(self):
+        return len(self.days)
+
+    def to_bytes(self):
+        days, values = self.days, self.values
+        if sys.byteorder == 'big':
+            days, values = array('i', days), array(values.typecode, values)
+            days.byteswap()
+            values.byteswap()
+        return HEADER.pack(self.version, len(days)) + days.tobytes() + values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, metric, blob):
+        version, count = HEADER.unpack_from(blob)
+        days, values = array('i'), array(value_typecode(metric))
+        offset = HEADER.size
+        days.frombytes(blob[offset:offset + count * days.itemsize])
+        values.frombytes(blob[offset + count * days.itemsize:])
+        if sys.byteorder == 'big':
+            days.byteswap()
+            values.byteswap()
+        return cls(metric, version, days, values)
+
+    def between(self, start=None, end=None):
+        """Slice of the series with dates in [start, end]"""
+        lo = bisect_left(self.days, epoch_day(start)) if start else 0
+        hi = bisect_right(self.days, epoch_day(end)) if end else len(self.days)
+        return Series(self.metric, self.version, self.days[lo:hi], self.values[lo:hi])
+
+    def set_values(self, changes):
+        """Apply {epoch day: value or None} changes; None removes the point"""
+        for day in sorted(changes):
+            value = changes[day]
+            index = bisect_left(self.days, day)
+            present = index < len(self.days) and self.days[index] == day
+            if value is None:
+                if present:
+                    self.days.pop(index)
+                    self.values.pop(index)
+            elif present:
+                self.values[index] = value
+            else:
+                self.days.insert(index, day)
+                self.values.insert(index, value)
+
+
+def _query_values(user_id, metric, **filters):
+    model, field = ROLLUP_METRICS[metric]
+    return (
+        model.objects.filter(user_id=user_id, **filters)
+        .exclude(**{f'{field}__isnull': True})
+        .order_by('date')
+        .values_list('date', field)
+    )
+
+
+def _store(user_id, series):
+    cache.set(_series_key(user_id, series.metric), series.to_bytes(),
+              timeout=getattr(settings, 'CHART_SERIES_TIMEOUT', 7 * 86400))
+
+
+def build_series(user_id, metric, version=None):
+    """Load the full series from the database and cache it"""
+    version = data_version(user_id, metric) if version is None else version
+    series = Series(metric, version)
+    for day, value in _query_values(user_id, metric):
+        series.days.append(epoch_day(day))
+        series.values.append(value)
+    _store(user_id, series)
+    return series
+
+
+def get_series(user_id, metric):
+    """Cached series of a user's metric, rebuilt if it's missing or stale"""
+    version = data_version(user_id, metric)
+    blob = cache.get(_series_key(user_id, metric))
+    if blob is not None:
+        series = Series.from_bytes(metric, blob)
+        if series.version == version:
+            return series
+    return build_series(user_id, metric, version)
+
+
+def downsample(series, points, method=DEFAULT_METHOD):
+    """Series reduced to at most `points` points, see downsampling.py"""
+    if not points or points >= len(series):
+        return series
+    days = np.frombuffer(series.days, dtype=np.int32)
+    values = np.frombuffer(series.values, dtype=series.values.typecode)
+    indices = downsample_indices(days, values, points, method)
+    return Series(series.metric, series.version,
+                  array('i', days[indices].tobytes()), array(series.values.typecode, values[indices].tobytes()))
+
+
+@receiver(metric_data_changed)
+def update_cached_series(sender, user_id, metric, dates, **kwargs):
+    """
+    Patch the cached series for the changed dates. Runs after the version
+    bump in caching, so an intact blob is exactly one version behind; any
+    other blob missed a concurrent write and is dropped instead.
+    """
+    if metric not in ROLLUP_METRICS:
+        return
+    key = _series_key(user_id, metric)
+    blob = cache.get(key)
+    if blob is None:
+        return
+
+    series = Series.from_bytes(metric, blob)
+    version = data_version(user_id, metric)
+    if series.version != version - 1:
+        cache.delete(key)
+        return
+
+    changes = dict.fromkeys((epoch_day(day) for day in dates), None)
+    changes.update((epoch_day(day), value) for day, value in _query_values(user_id, metric, date__in=dates))
+    series.set_values(changes)
+    series.version = version
+    _store(user_id, series)
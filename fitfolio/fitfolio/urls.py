@@ -27,6 +27,12 @@ router.register(r'sleep', views.SleepDataViewSet, basename='sleep')
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.dashboard, name='dashboard'),
+    path('api/dashboard/', views.dashboard_data, name='dashboard-data'),
+    path('api/analytics/', views.analytics, name='analytics'),
+    path('api/export/', views.export_data, name='export-data'),
+    path('api/import/', views.import_dump, name='import-dump'),
+    path('api/cache-stats/', views.response_cache_stats, name='response-cache-stats'),
+    path('metrics', views.metrics, name='metrics'),
     path('api/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls')),
 ]
@@ -1,93 +1,550 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import (
+    action, api_view, parser_classes, permission_classes, renderer_classes,
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, Sum
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from datetime import datetime, timedelta
-from .models import User, ActivityData, WeightData, SleepData
-from .serializers import UserSerializer, ActivityDataSerializer, WeightDataSerializer, SleepDataSerializer
+from django.utils.http import parse_etags
+from datetime import date, datetime, timedelta
+import hashlib
+import math
+import numpy as np
+from .models import User, ActivityData, WeightData, SleepData, MetricRollup, HealthSample
+from .serializers import (
+    UserSerializer, ActivityDataSerializer, WeightDataSerializer, SleepDataSerializer,
+    MetricRollupSerializer, FastReadSerializer,
+)
+from .pagination import MetricCursorPagination
+from .parsers import NDJSONParser
+from .renderers import NDJSONRenderer, CSVRenderer, BinaryRenderer, PrometheusRenderer
+from .export import parse_metrics, stream_export
+from .health_dump import DumpFormatError, import_health_dump
+from .bulk import bulk_upsert
+from .samples import day_range
+from .timeseries import VALUE_TYPES, downsample, from_epoch_day, get_series
+from .analytics import user_analytics
+from .downsampling import DEFAULT_METHOD, DOWNSAMPLERS, downsample_indices, downsample_rows
+from .signals import notify_metric_data_changed
+from .caching import cached_response_data, cache_stats, data_version
+from .routers import ReplicaReadMixin, replica_read
+from .instrumentation import render_metrics
 
 def dashboard(request):
     """Main dashboard view"""
     return render(request, 'dashboard.html')
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    """Hit/miss counters of the per-user response cache"""
+    return Response(cache_stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+@renderer_classes([PrometheusRenderer])
+def metrics(request):
+    """Sync pipeline metrics, summed across web and Celery worker processes"""
+    return Response(render_metrics(), content_type=PrometheusRenderer.content_type)
+
+def downsampling_params(request):
+    """Parse ?points=N (at least 3) and ?downsample=lttb|minmax; points is 0 when absent"""
+    try:
+        points = int(request.query_params.get('points') or 0)
+    except ValueError:
+        points = -1
+    if points and points < 3:
+        raise ValidationError({'points': 'Expected an integer of at least 3.'})
+    method = request.query_params.get('downsample') or DEFAULT_METHOD
+    if method not in DOWNSAMPLERS:
+        raise ValidationError({'downsample': f"Expected one of {', '.join(DOWNSAMPLERS)}."})
+    return points, method
+
+# (metric, model, days of history, columns) served by the dashboard endpoint
+DASHBOARD_SERIES = [
+    ('activity', ActivityData, 30, ['steps', 'distance', 'calories_burned']),
+    ('weight', WeightData, 90, ['weight']),
+    ('sleep', SleepData, 30, ['total_sleep_minutes', 'sleep_quality_score']),
+]
+
+def dashboard_etag(user_id, today, points=0, method=DEFAULT_METHOD):
+    """Strong ETag that changes whenever any of the user's dashboard data does"""
+    versions = ':'.join(str(data_version(user_id, metric)) for metric, _, _, _ in DASHBOARD_SERIES)
+    digest = hashlib.sha1(f'{user_id}:{today}:{versions}:{points}:{method}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+@api_view(['GET'])
+@replica_read
+def dashboard_data(request):
+    """
+    Stats and chart series for the dashboard in one columnar payload, e.g.
+    {"activity": {"dates": [...], "steps": [...], ...}, ..., "stats": {...}}
+    Answers If-None-Match with 304 when the user's data hasn't changed.
+    With ?points=N each series is downsampled on its first column.
+    """
+    today = datetime.now().date()
+    points, method = downsampling_params(request)
+    etag = dashboard_etag(request.user.pk, today, points, method)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        payload = {}
+        for metric, model, days, columns in DASHBOARD_SERIES:
+            rows = (
+                model.objects.filter(user=request.user, date__gte=today - timedelta(days=days))
+                .order_by('date')
+                .values_list('date', *columns)
+            )
+            series = dict(zip(['dates', *columns], map(list, zip(*rows)))) if rows else {}
+            payload[metric] = {name: series.get(name, []) for name in ['dates', *columns]}
+            if points and points < len(rows):
+                values = np.nan_to_num(np.array(payload[metric][columns[0]], dtype=float))
+                keep = downsample_indices(np.arange(len(values)), values, points, method)
+                payload[metric] = {name: [column[i] for i in keep] for name, column in payload[metric].items()}
+
+        activity, weight, sleep = payload['activity'], payload['weight'], payload['sleep']
+        last_sleep = sleep['total_sleep_minutes'][-1] if sleep['dates'] else None
+        payload['stats'] = {
+            'steps_today': activity['steps'][-1] if activity['dates'] and activity['dates'][-1] == today else None,
+            'current_weight': weight['weight'][-1] if weight['dates'] else None,
+            'last_sleep_minutes': last_sleep,
+            'last_sleep_formatted': f'{last_sleep // 60}h {last_sleep % 60}m' if last_sleep is not None else None,
+        }
+        response = Response(payload)
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api_view(['GET'])
+@replica_read
+def analytics(request):
+    """
+    Rolling 7/30-day averages, weight trend (EWMA), step/sleep correlation
+    and week-over-week deltas for the last ?days=7|30|90|365 (default 90)
+    """
+    try:
+        days = int(request.query_params.get('days', 90))
+    except ValueError:
+        days = None
+    if days not in SUMMARY_WINDOWS:
+        allowed = ', '.join(str(d) for d in SUMMARY_WINDOWS)
+        return Response({'error': f'days must be one of {allowed}'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(user_analytics(request.user.pk, datetime.now().date(), days))
+
+@api_view(['GET'])
+@renderer_classes([NDJSONRenderer, CSVRenderer])
+def export_data(request):
+    """
+    Stream the user's full history, one row per date
+    (?format=ndjson|csv&metrics=activity,weight,sleep)
+    """
+    try:
+        metrics = parse_metrics(request.query_params.get('metrics'))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    export_format = request.accepted_renderer.format
+    response = StreamingHttpResponse(
+        stream_export(request.user.pk, metrics, export_format),
+        content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="fitfolio-export.{export_format}"'
+    return response
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+def import_dump(request):
+    """
+    Import a Health Connect / HCGateway dump, sent either as the request
+    body (application/json or application/x-ndjson) or as a multipart
+    `file` upload. The body is decoded as it is read, never all at once.
+    """
+    if request.content_type.startswith('multipart/'):
+        upload = request.data.get('file')
+        if upload is None:
+            return Response({'error': 'Missing file upload'}, status=status.HTTP_400_BAD_REQUEST)
+        ndjson = upload.name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in (upload.content_type or '')
+        stream = upload
+    else:
+        ndjson = 'ndjson' in request.content_type
+        stream = request.stream
+        if stream is None:
+            return Response({'error': 'Empty request body'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        summary = import_health_dump(request.user, stream, 'ndjson' if ndjson else 'json')
+    except DumpFormatError as exc:
+        return Response({'error': f'Invalid dump: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(summary)
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
-class ActivityDataViewSet(viewsets.ModelViewSet):
-    serializer_class = ActivityDataSerializer
+SUMMARY_WINDOWS = (7, 30, 90, 365)
+
+class MetricDataMixin(ReplicaReadMixin):
+    """Shared behaviour of the per-user metric viewsets"""
+    replica_actions = ('list', 'retrieve', 'recent', 'summary', 'rollup', 'chart', 'intraday')
+    model = None
+    metric = None  # 'activity', 'weight' or 'sleep'
+    summary_field = None  # Value field described by the summary action
+    summary_filter = {}  # Extra filters for rows counted in the summary
+    sample_type = None  # HealthSample data type behind the daily rows, if any
+    pagination_class = MetricCursorPagination
 
     def get_queryset(self):
-        return ActivityData.objects.filter(user=self.request.user)
+        return self.model.objects.filter(user=self.request.user)
+
+    def fast_serializer(self, required_columns=()):
+        return FastReadSerializer(self.get_serializer_class(), self.request, required_columns)
+
+    def series_serializer(self, required_columns=()):
+        """fast_serializer whose rows always carry summary_field, for downsampled()"""
+        return FastReadSerializer(self.get_serializer_class(), self.request, required_columns,
+                                  required_fields=(self.summary_field,))
+
+    def list(self, request, *args, **kwargs):
+        """
+        List rows through the FastReadSerializer instead of per-row DRF
+        serialization. With ?points=N the whole filtered range is returned
+        unpaginated, downsampled to at most N rows.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        points, _ = downsampling_params(request)
+        if points:
+            # A downsampled range is one chart series rather than a page of rows
+            return Response(self.downsampled(self.series_serializer().serialize(queryset)))
+        # The cursor position is read from the date column of each row
+        serializer = self.fast_serializer(required_columns=('date',))
+        page = self.paginate_queryset(queryset.values(*serializer.columns))
+        if page is not None:
+            return self.get_paginated_response(serializer.from_dicts(page))
+        return Response(serializer.serialize(queryset))
+
+    def filter_queryset(self, queryset):
+        """Apply ?date__gte= / ?date__lte= range filters to list requests"""
+        queryset = super().filter_queryset(queryset)
+        for lookup in ('date__gte', 'date__lte'):
+            value = self.request.query_params.get(lookup)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: date.fromisoformat(value)})
+                except ValueError:
+                    raise ValidationError({lookup: 'Expected a date in YYYY-MM-DD format.'})
+        return queryset
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        instance = serializer.save(user=self.request.user)
+        self.data_changed([instance.date])
+
+    def perform_update(self, serializer):
+        old_date = serializer.instance.date
+        instance = serializer.save()
+        self.data_changed([old_date, instance.date])
+
+    def perform_destroy(self, instance):
+        old_date = instance.date
+        instance.delete()
+        self.data_changed([old_date])
+
+    def data_changed(self, dates):
+        notify_metric_data_changed(self.model, self.request.user.pk, self.metric, dates)
+
+    def sparse_fields(self):
+        """The ?fields= actually served, in serializer order (None when absent)"""
+        if not self.request.query_params.get('fields'):
+            return None
+        return ','.join(self.fast_serializer().names)
+
+    def cached(self, name, params, build):
+        """Serve response data from the per-user cache, invalidated by data_changed"""
+        params = {**params, 'today': datetime.now().date().isoformat(), 'fields': self.sparse_fields()}
+        return cached_response_data(self.request.user.pk, self.metric, name, params, build)
+
+    def downsampled(self, rows):
+        """
+        Apply ?points= / ?downsample= to rows of series_serializer(), on
+        summary_field, which is then dropped if ?fields= left it out
+        """
+        points, method = downsampling_params(self.request)
+        rows = downsample_rows(rows, self.summary_field, points, method)
+        if self.summary_field in self.fast_serializer().names:
+            return rows
+        return [{name: value for name, value in row.items() if name != self.summary_field} for row in rows]
+
+    def summary_days(self, request):
+        """Parse ?days=, returning (days, None) or (None, error response)"""
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = None
+        if days not in SUMMARY_WINDOWS:
+            allowed = ', '.join(str(d) for d in SUMMARY_WINDOWS)
+            return None, Response({'error': f'days must be one of {allowed}'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return days, None
+
+    def summarize(self, days):
+        """
+        Statistics of summary_field over the last `days` days (today
+        included) and the `days` days before them, computed in a single
+        aggregate query
+        """
+        field = self.summary_field
+        end = datetime.now().date()
+        start = end - timedelta(days=days - 1)
+        previous_start = start - timedelta(days=days)
+        windows = {
+            'current': Q(date__gte=start),
+            'previous': Q(date__gte=previous_start, date__lt=start),
+        }
+
+        aggregates = {}
+        for window, condition in windows.items():
+            aggregates.update({
+                f'{window}_count': Count(field, filter=condition),
+                f'{window}_sum': Sum(field, filter=condition),
+                f'{window}_avg': Avg(field, filter=condition),
+                f'{window}_min': Min(field, filter=condition),
+                f'{window}_max': Max(field, filter=condition),
+                # SQLite's STDDEV_POP errors on empty windows, so derive it from E[x^2]
+                f'{window}_avg_sq': Avg(F(field) * F(field), output_field=FloatField(), filter=condition),
+            })
+        values = (
+            self.get_queryset()
+            .filter(date__gte=previous_start, **self.summary_filter)
+            .order_by()
+            .aggregate(**aggregates)
+        )
+
+        stats = {}
+        for window in windows:
+            avg, avg_sq = values[f'{window}_avg'], values[f'{window}_avg_sq']
+            stats[window] = {
+                'count': values[f'{window}_count'],
+                'sum': values[f'{window}_sum'],
+                'avg': avg,
+                'min': values[f'{window}_min'],
+                'max': values[f'{window}_max'],
+                'stddev': math.sqrt(max(0.0, avg_sq - avg * avg)) if avg is not None else None,
+            }
+
+        current, previous = stats['current'], stats['previous']
+        trend = {
+            name: current[name] - previous[name]
+            if current[name] is not None and previous[name] is not None else None
+            for name in ('count', 'sum', 'avg')
+        }
+        return {
+            'field': field,
+            'days': days,
+            'from': start,
+            'to': end,
+            **current,
+            'previous': previous,
+            'trend': trend,
+        }
 
     @action(detail=False, methods=['get'])
-    def recent(self, request):
-        """Get recent activity data (last 30 days)"""
-        thirty_days_ago = datetime.now().date() - timedelta(days=30)
-        recent_data = self.get_queryset().filter(date__gte=thirty_days_ago)
-        serializer = self.get_serializer(recent_data, many=True)
+    def summary(self, request):
+        """Get summary statistics with deltas against the previous window (?days=7|30|90|365)"""
+        days, error = self.summary_days(request)
+        if error:
+            return error
+        return Response(self.cached('summary', {'days': days}, lambda: self.summarize(days)))
+
+    @action(detail=False, methods=['get'])
+    def rollup(self, request):
+        """Get pre-aggregated weekly or monthly statistics (?granularity=week|month&from=&to=)"""
+        granularity = request.query_params.get('granularity', 'week')
+        if granularity not in dict(MetricRollup.GRANULARITY_CHOICES):
+            return Response({'error': 'granularity must be "week" or "month"'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = MetricRollup.objects.filter(user=request.user, metric=self.metric, granularity=granularity)
+        try:
+            if request.query_params.get('from'):
+                rollups = rollups.filter(period_start__gte=date.fromisoformat(request.query_params['from']))
+            if request.query_params.get('to'):
+                rollups = rollups.filter(period_start__lte=date.fromisoformat(request.query_params['to']))
+        except ValueError:
+            return Response({'error': 'from and to must be dates in YYYY-MM-DD format'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = MetricRollupSerializer(rollups, many=True)
         return Response(serializer.data)
 
-class WeightDataViewSet(viewsets.ModelViewSet):
-    serializer_class = WeightDataSerializer
+    @action(detail=False, methods=['get'], renderer_classes=[JSONRenderer, BinaryRenderer])
+    def chart(self, request):
+        """
+        Chart series of summary_field from the columnar cache
+        (?from=&to=&points=N&downsample=lttb|minmax&format=json|bin). With
+        points, the series is downsampled to at most that many points. The binary form is the packed cache blob:
+        little-endian int64 version, uint32 count, int32 days since
+        1970-01-01, then values of the type in X-Series-Value-Type.
+        """
+        try:
+            start = date.fromisoformat(request.query_params['from']) if request.query_params.get('from') else None
+            end = date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else None
+        except ValueError:
+            return Response({'error': 'from and to must be dates in YYYY-MM-DD format'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        points, method = downsampling_params(request)
 
-    def get_queryset(self):
-        return WeightData.objects.filter(user=self.request.user)
+        series = downsample(get_series(request.user.pk, self.metric).between(start, end), points, method)
+        if request.accepted_renderer.format == 'bin':
+            response = Response(series.to_bytes())
+            response['X-Series-Value-Type'] = VALUE_TYPES[series.values.typecode]
+            return response
+        return Response({
+            'field': self.summary_field,
+            'dates': [from_epoch_day(day).isoformat() for day in series.days],
+            'values': series.values.tolist(),
+        })
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    @action(detail=False, methods=['get'])
+    def intraday(self, request):
+        """Raw samples of one day as columns (?date=YYYY-MM-DD, default today)"""
+        if self.sample_type is None:
+            return Response({'error': f'No intraday samples are stored for {self.metric}'},
+                            status=status.HTTP_404_NOT_FOUND)
+        try:
+            day = date.fromisoformat(request.query_params.get('date') or datetime.now().date().isoformat())
+        except ValueError:
+            return Response({'error': 'date must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        samples = (
+            HealthSample.objects.filter(user=request.user, data_type=self.sample_type, **day_range([day]))
+            .order_by('start')
+            .values_list('start', 'end', 'value')
+        )
+        columns = ['start', 'end', 'value']
+        series = dict(zip(columns, map(list, zip(*samples)))) if samples else {}
+        return Response({'date': day, **{name: series.get(name, []) for name in columns}})
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Create or update many days at once from a JSON array or an NDJSON body.
+
+        Every record is validated, the valid ones are upserted on (user, date)
+        in one transaction, and the response reports each record's status.
+        Fields a record leaves out keep their stored values on update.
+        """
+        records = request.data
+        if not isinstance(records, list):
+            return Response({'error': 'Expected a list of records'}, status=status.HTTP_400_BAD_REQUEST)
+        max_records = getattr(settings, 'METRIC_BULK_MAX_RECORDS', 1000)
+        if len(records) > max_records:
+            return Response({'error': f'At most {max_records} records per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer()
+        results = [None] * len(records)
+        rows = {}  # date -> (index, values); a later record for the same date wins
+        for index, record in enumerate(records):
+            try:
+                values = serializer.run_validation(record)
+            except ValidationError as exc:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': exc.detail}
+                continue
+            record_date = values.pop('date')
+            if record_date in rows:
+                previous = rows[record_date][0]
+                results[previous] = {'index': previous, 'date': record_date, 'status': 'superseded'}
+            rows[record_date] = (index, values)
+
+        fields = sorted({field for _, values in rows.values() for field in values})
+        result = bulk_upsert(self.model, request.user, {d: values for d, (_, values) in rows.items()}, fields)
+        for outcome, dates in (('created', result.created), ('updated', result.updated)):
+            for record_date in dates:
+                index = rows[record_date][0]
+                results[index] = {'index': index, 'date': record_date, 'status': outcome}
+        if rows:
+            self.data_changed(result.created + result.updated)
+
+        invalid = sum(1 for item in results if item['status'] == 'invalid')
+        return Response({
+            'created': result.created_count,
+            'updated': result.updated_count,
+            'invalid': invalid,
+            'results': results,
+        }, status=status.HTTP_400_BAD_REQUEST if invalid and not rows else status.HTTP_200_OK)
+
+class ActivityDataViewSet(MetricDataMixin, viewsets.ModelViewSet):
+    serializer_class = ActivityDataSerializer
+    model = ActivityData
+    metric = 'activity'
+    summary_field = 'steps'
+    sample_type = 'steps'
 
     @action(detail=False, methods=['get'])
     def recent(self, request):
-        """Get recent weight data (last 90 days)"""
-        ninety_days_ago = datetime.now().date() - timedelta(days=90)
-        recent_data = self.get_queryset().filter(date__gte=ninety_days_ago)
-        serializer = self.get_serializer(recent_data, many=True)
-        return Response(serializer.data)
+        """Get recent activity data (last 30 days)"""
+        def build():
+            thirty_days_ago = datetime.now().date() - timedelta(days=30)
+            recent_data = self.get_queryset().filter(date__gte=thirty_days_ago)
+            return self.series_serializer().serialize(recent_data)
 
-class SleepDataViewSet(viewsets.ModelViewSet):
-    serializer_class = SleepDataSerializer
+        return Response(self.downsampled(self.cached('recent', {}, build)))
 
-    def get_queryset(self):
-        return SleepData.objects.filter(user=self.request.user)
+class WeightDataViewSet(MetricDataMixin, viewsets.ModelViewSet):
+    serializer_class = WeightDataSerializer
+    model = WeightData
+    metric = 'weight'
+    summary_field = 'weight'
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    @action(detail=False, methods=['get'])
+    def recent(self, request):
+        """Get recent weight data (last 90 days)"""
+        def build():
+            ninety_days_ago = datetime.now().date() - timedelta(days=90)
+            recent_data = self.get_queryset().filter(date__gte=ninety_days_ago)
+            return self.series_serializer().serialize(recent_data)
+
+        return Response(self.downsampled(self.cached('recent', {}, build)))
+
+class SleepDataViewSet(MetricDataMixin, viewsets.ModelViewSet):
+    serializer_class = SleepDataSerializer
+    model = SleepData
+    metric = 'sleep'
+    summary_field = 'total_sleep_minutes'
+    summary_filter = {'total_sleep_minutes__gt': 0}
+    sample_type = 'sleepSession'
 
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """Get recent sleep data (last 30 days)"""
-        thirty_days_ago = datetime.now().date() - timedelta(days=30)
-        recent_data = self.get_queryset().filter(date__gte=thirty_days_ago)
-        serializer = self.get_serializer(recent_data, many=True)
-        return Response(serializer.data)
+        def build():
+            thirty_days_ago = datetime.now().date() - timedelta(days=30)
+            recent_data = self.get_queryset().filter(date__gte=thirty_days_ago)
+            return self.series_serializer().serialize(recent_data)
+
+        return Response(self.downsampled(self.cached('recent', {}, build)))
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get sleep summary statistics"""
-        recent_sleep = self.get_queryset().filter(
-            date__gte=datetime.now().date() - timedelta(days=30),
-            total_sleep_minutes__gt=0
-        )
-        
-        if not recent_sleep.exists():
-            return Response({
-                'avg_sleep_minutes': 0,
-                'avg_sleep_formatted': '0h 0m',
-                'total_nights': 0
+        """Get sleep summary statistics (?days=7|30|90|365, default 30)"""
+        days, error = self.summary_days(request)
+        if error:
+            return error
+
+        def build():
+            stats = self.summarize(days)
+            avg_minutes = int(stats['avg'] or 0)
+            stats.update({
+                'avg_sleep_minutes': avg_minutes,
+                'avg_sleep_formatted': f'{avg_minutes // 60}h {avg_minutes % 60}m',
+                'total_nights': stats['count'],
             })
-        
-        total_minutes = sum(s.total_sleep_minutes for s in recent_sleep)
-        avg_minutes = total_minutes // len(recent_sleep) if recent_sleep else 0
-        avg_hours = avg_minutes // 60
-        avg_mins = avg_minutes % 60
-        
-        return Response({
-            'avg_sleep_minutes': avg_minutes,
-            'avg_sleep_formatted': f'{avg_hours}h {avg_mins}m',
-            'total_nights': len(recent_sleep)
-        })
\ No newline at end of file
+            return stats
+
+        return Response(self.cached('summary', {'days': days}, build))